@@ -1,5 +1,6 @@
 import React, { useEffect, useRef, useState } from "react";
 import { getDocument, GlobalWorkerOptions, PDFDocumentProxy } from "pdfjs-dist";
+import { useCopilotContext } from "@copilotkit/react-core";
 
 // Set the worker source to the locally hosted file
 GlobalWorkerOptions.workerSrc = "/pdf.worker.min.mjs";
@@ -12,6 +13,7 @@ interface PDFThumbnailProps {
 
 interface FileSelected {
   file_url: string;
+  thread_id: string;
 }
 
 // Utility to post data to the server
@@ -36,6 +38,7 @@ const PDFThumbnail: React.FC<PDFThumbnailProps> = ({ fileUrl, width = 200 }) =>
   const canvasRef = useRef<HTMLCanvasElement>(null);
   const modalRef = useRef<HTMLDivElement>(null);
   const sidebarRef = useRef<HTMLDivElement>(null); // Reference for sidebar
+  const { threadId } = useCopilotContext(); // The agent reads the selection of this conversation
 
   // Extract file name from URL
   const fileName = fileUrl.split("/").pop() || "Unknown File";
@@ -84,7 +87,7 @@ const PDFThumbnail: React.FC<PDFThumbnailProps> = ({ fileUrl, width = 200 }) =>
     setContextMenuPosition(null); // Close context menu
 
     // Notify server of the selected file
-    postFileSelection({ file_url: fileUrl });
+    postFileSelection({ file_url: fileUrl, thread_id: threadId });
   };
 
   // Handle clicking outside the modal to close it
@@ -98,7 +101,7 @@ const PDFThumbnail: React.FC<PDFThumbnailProps> = ({ fileUrl, width = 200 }) =>
       setShowFullPDF(false);
 
       // Notify server of the closed file
-      postFileSelection({ file_url: "" });
+      postFileSelection({ file_url: "", thread_id: threadId });
     }
   };
 
@@ -159,7 +162,7 @@ const PDFThumbnail: React.FC<PDFThumbnailProps> = ({ fileUrl, width = 200 }) =>
                 setShowFullPDF(false);
 
                 // Notify server of the closed file
-                postFileSelection({ file_url: "" });
+                postFileSelection({ file_url: "", thread_id: threadId });
               }} // Close modal
               style={{ position: "absolute" }}
             >
@@ -477,4 +477,12 @@ def create_graph(scg_dataset: str) -> str:
             WITH n, count(distinct c) AS chunkCount
             SET n.weight = chunkCount
         """)
+
+        logger.info("Stamping the graph build version...")
+        build = graph.query("""
+            MERGE (b:__GraphBuild__ {id: 'scg'})
+            SET b.version = randomUUID(), b.completed_at = datetime()
+            RETURN b.version AS version
+        """)
+        mlflow.log_param("graph_version", build[0]["version"])
         logger.info("Done.")
@@ -6,6 +6,12 @@ from langchain_community.vectorstores.azuresearch import AzureSearch
 from langchain.docstore.document import Document
 from langchain_experimental.text_splitter import SemanticChunker
 from langchain_openai import AzureOpenAIEmbeddings
+from azure.search.documents.indexes.models import (
+    SearchableField,
+    SearchField,
+    SearchFieldDataType,
+    SimpleField,
+)
 import mlflow
 import os 
 
@@ -24,6 +30,27 @@ def _make_doc(sas_uri, chunks):
                         "level": chunk.level
                     },
                 ) for chunk_num, chunk in enumerate(chunks)]
+
+def _make_fields(embeddings: AzureOpenAIEmbeddings):
+    """
+    Index schema for document chunks. Besides the default AzureSearch fields, doc_name and 
+    chunk_number are promoted from the metadata to filterable, sortable fields so a document's 
+    chunks can be retrieved with a $filter in chunk order.
+    """
+    return [
+        SimpleField(name="id", type=SearchFieldDataType.String, key=True, filterable=True),
+        SearchableField(name="content", type=SearchFieldDataType.String),
+        SearchField(
+            name="content_vector",
+            type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+            searchable=True,
+            vector_search_dimensions=len(embeddings.embed_query("Text")),
+            vector_search_profile_name="myHnswProfile",
+        ),
+        SearchableField(name="metadata", type=SearchFieldDataType.String),
+        SimpleField(name="doc_name", type=SearchFieldDataType.String, filterable=True, sortable=True),
+        SimpleField(name="chunk_number", type=SearchFieldDataType.Int32, filterable=True, sortable=True),
+    ]
     
 async def process_doc():
     sas_uris = os.environ.get("DOCUMENT_SAS_URLS", None)
@@ -48,6 +75,7 @@ async def process_doc():
             azure_search_key=os.environ["AI_SEARCH_KEY"],
             index_name=os.environ["AI_SEARCH_INDEX"],
             embedding_function=embeddings.embed_query,
+            fields=_make_fields(embeddings),
         )
 
         reader = LayoutPDFReader(os.environ["NLM_INGESTOR_ENDPOINT"])
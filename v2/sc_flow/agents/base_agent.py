@@ -3,6 +3,8 @@
 
 from abc import ABC
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import RunnableConfig
+from typing import Optional
 from sc_flow.utils import configure_logging
 import logging
 configure_logging()
@@ -33,14 +35,15 @@ class BaseAgent(ABC):
             logging.warning("This agent has not been built, and the chain does not exist!")
         return self._chain
         
-    async def __call__(self, query: str) -> str:
-        return await self.invoke_chain(query)
+    async def __call__(self, query: str, config: Optional[RunnableConfig] = None) -> str:
+        return await self.invoke_chain(query, config)
 
-    async def invoke_chain(self, query: str) -> str:
+    async def invoke_chain(self, query: str, config: Optional[RunnableConfig] = None) -> str:
         """
         Helper to invoke a chain with a query.
 
         :param query: The user’s input query.
+        :param config: The runnable config of the calling node, so that streamed tokens reach the graph's stream.
         :return: The chain response.
         """
         raise NotImplementedError("This method has not been implemented.")
\ No newline at end of file
@@ -11,180 +11,36 @@ from langchain_core.runnables import RunnablePassthrough, RunnableConfig
 from .prompt import prompt
 
 from sc_flow.agents.state import State, ClassificationDecision, ExpertResponse, ExpertAnalysisState
-from sc_flow.utils import llm_generator, neo4j_vector_generator
-from sc_flow.utils import llm_generator
+from sc_flow.utils import llm_generator, neo4j_vector_generator, hedge_llm_generator, with_hedging, get_prompt_cache_metrics
+from sc_flow.agents.evaluators.evaluators import criteria_reference_inputs
+from sc_flow.agents.evaluators.prompts import criteria_reference_system
+from sc_flow.agents.evaluators.condensation import condense_evidence
+from .rules import decide_by_rules
+from sc_flow.utils.result_store import get_document_result_store
 from langchain_core.runnables import RunnablePassthrough, RunnableConfig
 from langchain.chains.router.multi_retrieval_qa import MultiRetrievalQAChain
 
-from copilotkit.langgraph import copilotkit_emit_state
+from copilotkit.langgraph import copilotkit_emit_state, copilotkit_customize_config
 from langchain.chains import RetrievalQA
 from langchain_core.messages.ai import AIMessage
 from langchain_core.output_parsers import StrOutputParser
-
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents.aio import SearchClient
 from langchain_core.prompts import ChatPromptTemplate
 
-import ast
+from typing import Optional
+import logging
+import re
 import os
 
-get_unclass_details_prompt = """
-You are an analyst specializaing in classification protocols, security policies, 
-and regulatory frameworks. 
-The knowledge graph contains detailed representations of classification criteria, 
-relationships, and hierarchies for securing sensitive information. 
-Your task is to retrieve all criteria required to classify information as 
-**Unclassified** based on the following guidelines:
-
-Scope of Retrieval:
-
-Include all explicit criteria directly related to Unclassified designation.
-
-Attributes to Retrieve:
-
-Criterion name and description.
-Regulatory references or definitions (e.g., "EO 13526" or public access laws like FOIA).
-Conditions that make information publicly releasable.
-Limitations or restrictions for Unclassified information (e.g., "For Official Use Only").
-Relationships to Explore:
-
-Downward dependencies from higher classifications (e.g., what explicitly precludes Secret, Top Secret).
-Relationships to public information policies, transparency guidelines, and open data standards.
-Caveats for controlled unclassified information (CUI) or other nuanced designations.
-Metadata:
-
-Include sources or citations for each criterion.
-Note any relationships to laws or policies governing public dissemination.
-Highlight any exceptions or situations where unclassified information is still restricted.
-Output Format:
-
-Summarize the criteria in structured fields (e.g., "Name," "Description," "Public Availability").
-Clearly differentiate Unclassified information from related categories like Controlled Unclassified Information (CUI) or Sensitive but Unclassified (SBU).
-Based on this input, provide a response that comprehensively defines the criteria for information to be classified as Unclassified, ensuring clarity and completeness.
-
-Be comprehensive and do not include anything else in your response besides the critera.
-"""
-
-get_s_details_prompt = """
-You are an analyst specializaing in classification protocols, security policies, 
-and regulatory frameworks. 
-The knowledge graph contains detailed representations of classification criteria, 
-relationships, and hierarchies for securing sensitive information. 
-Your task is to retrieve all criteria required to classify information as 
-**Secret** based on the following guidelines:
-
-Scope of Retrieval:
-
-Include all explicit criteria directly related to Secret classification.
-Attributes to Retrieve:
-
-Criterion name and description.
-Regulatory reference (e.g., "Executive Order 13526").
-Specific conditions (e.g., "could cause serious damage to national security").
-Thresholds or levels of risk (e.g., "serious damage" vs. "exceptionally grave damage").
-Relationships to Explore:
-
-Parent-child relationships between classification levels.
-Dependencies (e.g., legal mandates, organizational policies).
-Exceptions or caveats (e.g., downgrade conditions or special cases).
-Metadata:
-
-Include sources or citations for each criterion.
-Highlight relationships that define precedence or hierarchical importance.
-Output Format:
-
-Summarize the criteria in structured fields (e.g., "Name," "Description," "Risk Level," "Conditions").
-Group criteria by overarching themes (e.g., "National Security," "Economic Security").
-Based on this input, provide a response that captures all relevant information and ensures completeness. 
-If applicable, explain how the relationships and dependencies contribute to the classification as Secret.
-
-Be comprehensive and do not include anything else in your response besides the critera.
-"""
-get_ts_details_prompt = """
-You are an analyst specializaing in classification protocols, security policies, 
-and regulatory frameworks. 
-The knowledge graph contains detailed representations of classification criteria, 
-relationships, and hierarchies for securing sensitive information. 
-Your task is to retrieve all criteria required to classify information as 
-**Top Secret** based on the following guidelines:
-
-Scope of Retrieval:
-
-Include all explicit criteria directly related to Top Secret classification.
-Attributes to Retrieve:
-
-Criterion name and description.
-Regulatory reference (e.g., "Executive Order 13526").
-Specific conditions (e.g., "could cause exceptionally grave damage to national security").
-Thresholds or levels of risk (e.g., "grave damage" vs. "serious damage").
-Relationships to Explore:
-
-Parent-child relationships between classification levels.
-Dependencies (e.g., legal mandates, organizational policies).
-Exceptions or caveats (e.g., downgrade conditions or special cases).
-Metadata:
-
-Include sources or citations for each criterion.
-Highlight relationships that define precedence or hierarchical importance.
-Output Format:
-
-Summarize the criteria in structured fields (e.g., "Name," "Description," "Risk Level," "Conditions").
-Group criteria by overarching themes (e.g., "National Security," "Intelligence Operations," "Allied Trust").
-Based on this input, provide a response that captures all relevant information and ensures completeness. 
-If applicable, explain how the relationships and dependencies contribute to the classification as Top Secret.
-
-Be comprehensive and do not include anything else in your response besides the critera.
-"""
-
-ts_evaluator_prompt = ChatPromptTemplate([
-    ("system", """ 
-    You are an expert in determining whether or not textual content contains information that is classified at the Top Secret level. 
-    If any of the content in the text is considered Top Secret, the entire text is considered classified at Top Secret.
-    When giving your reasoning for your classification decision, be extremely explicit and cite examples.
-    Examples of content that would constitute Top Secret material include: 
-
-    {context}
-    """), 
-    ("user", """{content}""")
-])
-
-s_evaluator_prompt = ChatPromptTemplate([
-    ("system", """ 
-    You are an expert in determining whether or not textual content contains information that is classified at the Secret level. 
-    If any of the content in the text is considered Secret, the entire text is considered classified at Secret.
-    When giving your reasoning for your classification decision, be extremely explicit and cite examples.
-    Examples of content that would constitute Secret material include: 
-
-    {context}
-    """),
-    ("user", """{content}""")
-])
-
-unclass_evaluator_prompt = ChatPromptTemplate([
-    ("system", """ 
-    You are an expert in determining whether or not textual content contains information that is unclassified or controlled unclassified information. 
-    If any of the content in the text is NOT unclassified, the entire text is considered classified at some level.
-    When giving your reasoning for your classification decision, be extremely explicit and cite examples.
-    Examples of content that would constitute classified material include: 
-
-    {context}
-     
-    """),
-    ("user", """{content}""")
-])
+CLASSIFICATION_LABELS = ["Top Secret", "Secret", "CUI", "Unclassified"]
 
 agent_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
     ("system", """ 
     You are the final decision authority on the level of classification (Top Secret, Secret, or Unclassified/CUI)
     to which a given document belongs. 
-    You will be given an extensive set of context pertaining to classification levels and their varying criteria, as 
-     well as a body of text to evaluate against the criteria. You will return a final classification decision
-     as well as an elaborate explanation of your decision.
-     
-     Classification context:
-     {top_secret_context}
-     {secret_context}
-     {unclassified_context}
+    You will be given a body of text to evaluate against the criteria in the classification reference. 
+     You will return a final classification decision as well as an elaborate explanation of your decision.
+     If any of the content is classified at a level, the whole document is classified at that level.
 
     """), 
     ("user", """ 
@@ -197,77 +53,150 @@ agent_prompt = ChatPromptTemplate([
      """)
 ])
 
-async def classifier_authority(state: ExpertAnalysisState, config: RunnableConfig) -> State:
+def _parse_classification(response: str) -> Optional[str]:
+    match = re.search(r"Classification Decision:\W*(Top Secret|Secret|CUI|Unclassified)", response, re.IGNORECASE)
+    if match is None:
+        return None
+    return {label.lower(): label for label in CLASSIFICATION_LABELS}[match.group(1).lower()]
+
+def _authority_deadline() -> float:
+    """The deadline of the authority and whole-document calls, which generate far longer answers than a chunk verdict"""
+    return float(os.environ.get("AUTHORITY_CALL_DEADLINE_SECONDS", 300))
+
+def _with_coverage_note(state: State, response: str) -> str:
+    """Say when the classification is provisional, with the coverage it rests on"""
+    provisional = (state.get("coverage") or {}).get("provisional")
+    if not provisional:
+        return response
+    return f"{response}\n\nThis classification is {provisional}. Disable the quick scan or markings skip for a full evaluation."
+
+def _store_result(state: State, response: str, analysis: Optional[list] = None):
+    document_version = state.get("document_version")
+    if not document_version:
+        return
+    coverage = state.get("coverage") or {}
+    get_document_result_store().put(document_version["doc_name"],
+                                    document_version["version"],
+                                    document_version["graph_version"],
+                                    document_version["evaluation_mode"],
+                                    _parse_classification(response),
+                                    response,
+                                    analysis if analysis is not None else state["classification_analysis"],
+                                    {**coverage, "unevaluated_chunks": len(set(state.get("unevaluated_chunks") or []))})
+
+async def classifier_authority(state: State, config: RunnableConfig) -> State:
     llm = llm_generator()
 
     classification_decisions = dict(state['classification_analysis'])
+    schedule = state.get('chunk_schedule') or {}
+    unevaluated = sorted(set(state.get('unevaluated_chunks') or []))
+    coverage = state.get('coverage') or {"total_chunks": 0, "covered_chunks": 0}
+    resp = decide_by_rules(classification_decisions,
+                           coverage['covered_chunks'] - len(unevaluated),
+                           coverage['total_chunks'],
+                           schedule)
+    if resp:
+        resp = _with_coverage_note(state, resp)
+        _store_result(state, resp)
+        return {
+            'messages': AIMessage(content=resp),
+            'next_agent': 'user_proxy',
+            'logs': [{"message": "Classification decided by rules, the evidence is unambiguous", "done": True}]
+        }
+    if unevaluated:
+        listed = ', '.join(str(chunk_number) for chunk_number in unevaluated[:20])
+        return _incomplete_classification(classification_decisions,
+                                          f"{len(unevaluated)} chunk(s) could not be evaluated within the LLM call deadline "
+                                          f"(chunks {listed}{', ...' if len(unevaluated) > 20 else ''})")
+
+    evidence = {
+        agent_name: condense_evidence(classification_decisions.get(agent_name, []), schedule.get(level))
+        for agent_name, level in [('top_secret_expert_agent', 'top_secret'),
+                                  ('secret_expert_agent', 'secret'),
+                                  ('unclass_expert_agent', 'unclassified')]
+    }
     security_classifier_chain = (
         {
-            "unclass_expert_recommendations": lambda x: classification_decisions['unclass_expert_agent'],
-            "secret_expert_recommendations": lambda x: classification_decisions['secret_expert_agent'],
-            "top_secret_expert_recommendations": lambda x: classification_decisions['top_secret_expert_agent'],
+            **criteria_reference_inputs(state['criteria_contexts']),
+            "unclass_expert_recommendations": lambda x: evidence['unclass_expert_agent'],
+            "secret_expert_recommendations": lambda x: evidence['secret_expert_agent'],
+            "top_secret_expert_recommendations": lambda x: evidence['top_secret_expert_agent'],
         }
         | prompt
-        | llm
+        | with_hedging(llm, hedge_llm_generator(), "authority", _authority_deadline())
         | StrOutputParser()
     )
-    resp = await security_classifier_chain.ainvoke(state['user_query'])
+    try:
+        resp = await security_classifier_chain.ainvoke(state['ctx_doc'],
+                                                       copilotkit_customize_config(config, emit_messages=True))
+    except TimeoutError as e:
+        logging.error(f"Classifier authority call on {state['ctx_doc']} failed: {e}")
+        return _incomplete_classification(classification_decisions, "the classifier authority call exceeded its deadline")
+    get_prompt_cache_metrics().log_summary()
+    resp = _with_coverage_note(state, resp)
+    _store_result(state, resp)
     return {
         'messages': AIMessage(content=resp),
         'next_agent': 'user_proxy',
-        'logs': state['inner_state']['logs']
+        'logs': []
     }
 
-def get_search_client():
-    search_client = SearchClient(os.environ["AI_SEARCH_ENDPOINT"], 
-                                 os.environ["AI_SEARCH_INDEX"], 
-                                 AzureKeyCredential(os.environ["AI_SEARCH_KEY"]))
-    return search_client
+def _incomplete_classification(classification_decisions: dict, reason: str) -> State:
+    """
+    Report a classification that cannot be decided because chunks could not be evaluated, or the deciding 
+    call timed out. Content that was not judged may be above any level found, so no label is decided or stored.
 
-async def evaluator(state: State, config: RunnableConfig):
-    #await copilotkit_emit_state(config, state)
+    :param classification_decisions: The positive decisions of each expert, by agent name.
+    :param reason: Why the classification could not be decided.
+    """
+    found = next((label for agent_name, label in [('top_secret_expert_agent', 'Top Secret'),
+                                                  ('secret_expert_agent', 'Secret')]
+                  if classification_decisions.get(agent_name)), None)
+    resp = f"Classification incomplete: {reason}, so no classification was decided or stored."
+    if found:
+        resp += f" The evaluated chunks already contain {found} content, so the document is at least {found}."
+    resp += " Ask me to re-run the classification to evaluate the document again."
+    return {
+        'messages': AIMessage(content=resp),
+        'next_agent': 'user_proxy',
+        'logs': [{"message": f"Classification incomplete: {reason}", "done": True}]
+    }
 
-    topChunks = os.environ.get("TOP_CHUNKS", 3)
-    topCommunities = os.environ.get("TOP_COMMUNITIES", 3)
-    topInsideRels = os.environ.get("TOP_INSIDE_RELS", 10)
-    topOutsideRels = os.environ.get("TOP_OUTSIDE_RELS", 10)
+async def stored_classification(state: State) -> State:
+    """Answer with the stored classification of an unchanged document"""
+    stored = state['stored_result']
+    return {
+        'messages': AIMessage(content=f"{stored['explanation']}\n\n"
+                                      f"This classification was stored on {stored['timestamp']}. "
+                                      f"Ask me to re-run the classification to analyze the document again."),
+        'next_agent': 'user_proxy',
+        'logs': []
+    }
 
-    search_client = get_search_client()
-    store = neo4j_vector_generator(topChunks, topCommunities, topOutsideRels, topInsideRels)
-    llm = llm_generator()
+async def document_evaluator(state: State, config: RunnableConfig) -> State:
     """
-    ctxs = []
-    for prompt in [get_ts_details_prompt, get_s_details_prompt, get_unclass_details_prompt]:
-        graph_chain = RetrievalQA.from_chain_type(
-            llm, chain_type="stuff", retriever=store.as_retriever()
-        )
-        
-        ctx = await graph_chain.ainvoke({"query":prompt}, 
-                                return_only_outputs=True)
-        ctxs += [ctx["result"]]
+    Classify a short document with a single whole-document call, instead of evaluating its chunks 
+    and deciding with the authority. The orchestrator routes here when the document fits SHORT_DOCUMENT_TOKEN_BUDGET.
     """
+    llm = llm_generator()
     agent_chain = (
-        {
-            "top_secret_context": lambda x: store.as_retriever().get_relevant_documents(get_ts_details_prompt),
-            "secret_context": lambda x: store.as_retriever().get_relevant_documents(get_s_details_prompt),
-            "unclassified_context": lambda x: store.as_retriever().get_relevant_documents(get_unclass_details_prompt),
-            "content": RunnablePassthrough()
-        }
+        criteria_reference_inputs(state['criteria_contexts'])
         | agent_prompt
-        | llm
+        | with_hedging(llm.with_structured_output(ClassificationDecision),
+                       hedge_llm_generator().with_structured_output(ClassificationDecision),
+                       "document_evaluator",
+                       _authority_deadline())
     )
 
-    content = []
-    async with search_client:
-        results = await search_client.search(search_text=state['ctx_doc'])
-        async for result in results:
-            metadata = ast.literal_eval(result["metadata"])
-            if metadata["doc_name"] != state['ctx_doc']:
-                continue
-            content += [result["content"]]
-
-    decision = await agent_chain.ainvoke("\n".join(content), return_only_outputs=True)
-    print(decision)
+    try:
+        decision = await agent_chain.ainvoke("\n".join(chunk['content'] for chunk in state['chunks']))
+    except TimeoutError as e:
+        logging.error(f"Whole-document evaluation of {state['ctx_doc']} failed: {e}")
+        return _incomplete_classification({}, "the whole-document evaluation call exceeded its deadline")
+    resp = f"Classification Decision: {decision['classification']}\nExplanation: {decision['explanation']}"
+    _store_result(state, resp, [("document_evaluator", [decision])])
     return {
-        "messages": decision
-    }
\ No newline at end of file
+        'messages': AIMessage(content=resp),
+        'next_agent': 'user_proxy',
+        'logs': []
+    }
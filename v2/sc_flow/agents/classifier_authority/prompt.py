@@ -1,9 +1,11 @@
 # Copyright (c) 2024 Microsoft Corporation.
 # Licensed under the MIT License
 
+from sc_flow.agents.evaluators.prompts import criteria_reference_system
 from langchain_core.prompts import ChatPromptTemplate
 
 prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
     ("system", """ 
     You are the final decision authority on the level of classification (Top Secret, Secret, or Unclassified/CUI)
     to which a given document belongs. 
@@ -0,0 +1,69 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.evaluators.condensation import condense_evidence
+from typing import Dict, List, Optional
+import logging
+import os
+
+def _decision(classification: str, reason: str, citations: List[dict], schedule: Optional[List[int]]) -> str:
+    cited = condense_evidence(citations, schedule, int(os.environ.get("AUTHORITY_RULE_CITATIONS", 3))) if citations else ""
+    return (f"Classification Decision: {classification}\n"
+            f"Explanation: {reason}\n\n{cited}").rstrip()
+
+def decide_by_rules(classification_decisions: Dict[str, list],
+                    evaluated_chunks: int,
+                    total_chunks: int,
+                    schedule: Optional[dict] = None) -> Optional[str]:
+    """
+    Decide the document classification without the LLM when the expert evidence is unambiguous.
+
+    - Top Secret when the Top Secret expert found at least AUTHORITY_RULE_MIN_POSITIVES chunks.
+    - Secret when no chunk is Top Secret and the Secret expert found at least AUTHORITY_RULE_MIN_POSITIVES chunks.
+    - CUI or Unclassified when neither the Top Secret nor the Secret expert found anything.
+
+    A single Top Secret or Secret finding below the threshold is borderline and left to the LLM.
+    Only Top Secret, the highest level, can be decided when some chunks were not evaluated, since any of 
+    them could hold content above a lower level. The rules are disabled with AUTHORITY_RULES=false.
+
+    :param classification_decisions: The positive decisions of each expert, by agent name.
+    :param evaluated_chunks: The number of the document's chunks with a verdict.
+    :param total_chunks: The number of chunks in the document.
+    :param schedule: The similarity schedule of each level, used to order the cited chunks.
+    :return: The decision with a templated explanation, or None when the LLM must decide.
+    """
+    if os.environ.get("AUTHORITY_RULES", "true").lower() != "true":
+        return None
+
+    schedule = schedule or {}
+    min_positives = int(os.environ.get("AUTHORITY_RULE_MIN_POSITIVES", 2))
+    top_secret = classification_decisions.get("top_secret_expert_agent") or []
+    secret = classification_decisions.get("secret_expert_agent") or []
+    unclassified = classification_decisions.get("unclass_expert_agent") or []
+
+    if len(top_secret) >= min_positives:
+        logging.info(f"Rules decided Top Secret from {len(top_secret)} chunk(s)")
+        return _decision("Top Secret",
+                         f"The Top Secret expert found {len(top_secret)} chunk(s) matching the Top Secret criteria, "
+                         f"and the highest level found anywhere in a document applies to the whole document.",
+                         top_secret, schedule.get("top_secret"))
+    if total_chunks == 0 or evaluated_chunks < total_chunks:
+        logging.info(f"Rules only decide Top Secret on partial coverage ({evaluated_chunks}/{total_chunks} chunks)")
+        return None
+    if not top_secret and len(secret) >= min_positives:
+        logging.info(f"Rules decided Secret from {len(secret)} chunk(s)")
+        return _decision("Secret",
+                         f"No chunk matched the Top Secret criteria, and the Secret expert found {len(secret)} chunk(s) "
+                         f"matching the Secret criteria, so the document is classified at the Secret level.",
+                         secret, schedule.get("secret"))
+    if not top_secret and not secret:
+        controlled = [decision for decision in unclassified if decision["classification"] == "CUI"]
+        classification = "CUI" if controlled else "Unclassified"
+        logging.info(f"Rules decided {classification}, no Top Secret or Secret chunks")
+        reason = "Neither the Top Secret nor the Secret expert found any chunk matching their criteria"
+        if controlled:
+            reason += f", but {len(controlled)} chunk(s) contain controlled unclassified information."
+        else:
+            reason += ", and no chunk contains controlled unclassified information."
+        return _decision(classification, reason, controlled, schedule.get("unclassified"))
+    return None
@@ -0,0 +1,72 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from .preprocessing import canonicalize_chunk
+from typing import List, Optional
+import os
+
+def _truncate(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit].rstrip() + "..."
+
+def _chunk_ranges(chunk_numbers: List[int], limit: int) -> str:
+    """The chunk numbers collapsed into ranges, at most limit ranges, with the count of the rest"""
+    ranges = []
+    for chunk_number in sorted(set(chunk_numbers)):
+        if ranges and chunk_number == ranges[-1][1] + 1:
+            ranges[-1][1] = chunk_number
+        else:
+            ranges += [[chunk_number, chunk_number]]
+    shown = ", ".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges[:limit])
+    remaining = sum(end - start + 1 for start, end in ranges[limit:])
+    return f"{shown} (+{remaining} more)" if remaining else shown
+
+def _decisiveness(decision: dict, rank: dict) -> tuple:
+    """Explicit markings first, then LLM verdicts in similarity order, then triaged chunks"""
+    if "markings" in decision:
+        return (0, 0, decision["chunk_number"])
+    if "similarity" in decision:
+        return (2, -decision["similarity"], decision["chunk_number"])
+    return (1, rank.get(decision["chunk_number"], len(rank)), decision["chunk_number"])
+
+def condense_evidence(decisions: List[dict], schedule: Optional[List[int]] = None, top_n: Optional[int] = None) -> str:
+    """
+    Condense one expert's positive decisions into a bounded summary for the classifier authority.
+    Decisions on identical chunk contents are merged into one item, items are ordered from most to 
+    least decisive and only the top AUTHORITY_EVIDENCE_PER_LEVEL items are kept, each with a truncated 
+    explanation and excerpt, and its chunk numbers collapsed into at most AUTHORITY_CHUNK_RANGES ranges. 
+    The rest are only counted.
+
+    :param decisions: The expert's positive decisions.
+    :param schedule: The level's similarity schedule, chunk numbers most similar first, if one was computed.
+    :param top_n: The number of items to keep. Defaults to AUTHORITY_EVIDENCE_PER_LEVEL.
+    :return: The condensed evidence.
+    """
+    if not decisions:
+        return "No chunks were found at this level."
+
+    top_n = top_n or int(os.environ.get("AUTHORITY_EVIDENCE_PER_LEVEL", 10))
+    explanation_chars = int(os.environ.get("AUTHORITY_EXPLANATION_CHARS", 600))
+    excerpt_chars = int(os.environ.get("AUTHORITY_EXCERPT_CHARS", 300))
+    chunk_ranges = int(os.environ.get("AUTHORITY_CHUNK_RANGES", 5))
+    rank = {chunk_number: i for i, chunk_number in enumerate(schedule or [])}
+
+    clusters = {}
+    for decision in sorted(decisions, key=lambda decision: _decisiveness(decision, rank)):
+        key = canonicalize_chunk(decision["original_content"])
+        clusters.setdefault(key, []).append(decision)
+
+    items = list(clusters.values())
+    lines = [f"{len(decisions)} chunk(s) found at this level, the {min(top_n, len(items))} most decisive of "
+             f"{len(items)} distinct finding(s) are shown."]
+    for cluster in items[:top_n]:
+        decision = cluster[0]
+        chunk_numbers = _chunk_ranges([member["chunk_number"] for member in cluster], chunk_ranges)
+        lines += [f"- Chunk(s) {chunk_numbers} ({decision['classification']}): "
+                  f"{_truncate(decision['explanation'], explanation_chars)}\n"
+                  f"  Excerpt: {_truncate(decision['original_content'], excerpt_chars)}"]
+
+    omitted = sum(len(cluster) for cluster in items[top_n:])
+    if omitted:
+        lines += [f"{omitted} further chunk(s) with less decisive findings are omitted."]
+    return "\n".join(lines)
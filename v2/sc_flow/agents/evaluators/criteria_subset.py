@@ -0,0 +1,59 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.state import DocumentChunk
+from sc_flow.agents.evaluators.triage import embed_chunks
+from sc_flow.utils import neo4j_vector_generator
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import Neo4jVector
+from typing import Dict, List
+import numpy as np
+import asyncio
+import logging
+import os
+
+def get_criteria_subset_store() -> Neo4jVector:
+    """
+    Neo4j vector store for per-chunk criteria lookups. The retrieval is narrower than the level criteria 
+    retrieval, so that each chunk's prompt only carries the entities and community summaries closest to it.
+    """
+    topChunks = os.environ.get("CRITERIA_SUBSET_TOP_CHUNKS", "1")
+    topCommunities = os.environ.get("CRITERIA_SUBSET_TOP_COMMUNITIES", "2")
+    topInsideRels = os.environ.get("CRITERIA_SUBSET_TOP_INSIDE_RELS", "5")
+    topOutsideRels = os.environ.get("CRITERIA_SUBSET_TOP_OUTSIDE_RELS", "5")
+    return neo4j_vector_generator(topChunks, topCommunities, topOutsideRels, topInsideRels)
+
+async def subset_criteria(chunks: List[DocumentChunk],
+                          chunk_embeddings: Dict[int, np.ndarray],
+                          embeddings: Embeddings,
+                          store: Neo4jVector,
+                          top_k: int) -> List[DocumentChunk]:
+    """
+    Attach to each chunk the SCG criteria most relevant to it: the top_k `__Entity__` nodes nearest to 
+    the chunk's embedding, with their community summaries, relationships and source text.
+
+    :param chunks: The chunks to evaluate.
+    :param chunk_embeddings: Chunk embeddings already computed for triage or scheduling, by chunk number.
+        Chunks without one are embedded here.
+    :param embeddings: The embedding model.
+    :param store: The Neo4j vector store from get_criteria_subset_store.
+    :param top_k: The number of criteria entities to retrieve per chunk.
+    :return: The chunks, each with its "criteria".
+    """
+    missing = [chunk for chunk in chunks if chunk["chunk_number"] not in chunk_embeddings]
+    if missing:
+        vectors = await embed_chunks(missing, embeddings)
+        chunk_embeddings = {**chunk_embeddings, **{chunk["chunk_number"]: vector for chunk, vector in zip(missing, vectors)}}
+
+    semaphore = asyncio.Semaphore(int(os.environ.get("CRITERIA_SUBSET_CONCURRENCY", 8)))
+    async def lookup(chunk: DocumentChunk) -> str:
+        async with semaphore:
+            documents = await asyncio.to_thread(store.similarity_search_by_vector,
+                                                chunk_embeddings[chunk["chunk_number"]].tolist(),
+                                                k=top_k)
+        return "\n".join(document.page_content for document in documents)
+
+    criteria = await asyncio.gather(*(lookup(chunk) for chunk in chunks))
+    logging.info(f"Retrieved the top {top_k} criteria for each of {len(chunks)} chunks, "
+                 f"averaging {sum(len(text) for text in criteria) // max(len(chunks), 1)} characters per chunk")
+    return [{**chunk, "criteria": text} for chunk, text in zip(chunks, criteria)]
@@ -2,177 +2,651 @@
 # Licensed under the MIT License
 
 from .prompts import *
-from sc_flow.agents.state import ExpertAnalysisState, ClassificationDecision, ExpertResponse
-from sc_flow.utils import llm_generator, neo4j_vector_generator
-from langchain_core.runnables import RunnablePassthrough, RunnableConfig
-from copilotkit.langgraph import copilotkit_emit_state
+from sc_flow.agents.state import (
+    ExpertAnalysisState,
+    ClassificationDecision,
+    BatchClassificationDecision,
+    ClassificationLabel,
+    BatchClassificationLabel,
+    TriLevelClassificationDecision,
+    BatchTriLevelClassificationDecision,
+    DocumentChunk,
+    ExpertResponse
+)
+from sc_flow.utils import (
+    llm_generator,
+    hedge_llm_generator,
+    with_hedging,
+    get_llm_deployment_name,
+    neo4j_vector_generator,
+    num_tokens_from_string
+)
+from sc_flow.utils.criteria_cache import get_criteria_cache, get_graph_build_version
+from sc_flow.utils.verdict_cache import get_verdict_cache
+from .progress import EvaluationProgress
+from .preprocessing import expand_duplicates
+from langchain_core.runnables import Runnable, RunnablePassthrough, RunnableConfig
 from langchain.chains import RetrievalQA
 from azure.core.credentials import AzureKeyCredential
 from azure.search.documents.aio import SearchClient
-import ast
+from typing import List, Optional
+import asyncio
+import weakref
+import json
+import logging
 import os
 
+_semaphores = weakref.WeakKeyDictionary()
+
 def get_search_client():
-    search_client = SearchClient(os.environ["AI_SEARCH_ENDPOINT"], 
-                                 os.environ["AI_SEARCH_INDEX"], 
+    search_client = SearchClient(os.environ["AI_SEARCH_ENDPOINT"],
+                                 os.environ["AI_SEARCH_INDEX"],
                                  AzureKeyCredential(os.environ["AI_SEARCH_KEY"]))
     return search_client
 
-async def ts_evaluator(state: ExpertAnalysisState, config: RunnableConfig):
-    state["logs"].append({
-        "message": f"Top Secret Evaluator agent is analyzing...",
-        "done": False
-    })
- 
-    #await copilotkit_emit_state(config, state)
+def get_evaluator_semaphore() -> asyncio.Semaphore:
+    """
+    Semaphore bounding the number of in-flight chunk evaluations.
+
+    The semaphore is shared by every evaluator running on the same event loop, so the
+    three parallel evaluators together never exceed EVALUATOR_MAX_CONCURRENCY calls.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(int(os.environ.get("EVALUATOR_MAX_CONCURRENCY", 8)))
+    return _semaphores[loop]
+
+class PositiveQuota:
+    """
+    Counts positive verdicts for a level so that evaluation can stop early once
+    enough positives have been found to confirm the level.
+    """
+    def __init__(self, positive_labels: List[str], required: Optional[int] = None):
+        self.positive_labels = positive_labels
+        self.required = required
+        self.positives = 0
+
+    def record(self, decision: Optional[ClassificationDecision]):
+        if decision is not None and decision["classification"] in self.positive_labels:
+            self.positives += 1
+
+    @property
+    def reached(self) -> bool:
+        return self.required is not None and self.positives >= self.required
+
+def _unevaluated(error: Exception) -> dict:
+    """The decision for a chunk whose evaluation failed, which must not be taken for a negative verdict"""
+    return {"classification": "Unevaluated", "explanation": f"Not evaluated: {error}", "unevaluated": True}
+
+async def _invoke_with_retries(chain: Runnable, input: str, description: str):
+    """Invoke the chain, retrying up to LLM_CALL_RETRIES times when the call exceeds its deadline"""
+    retries = int(os.environ.get("LLM_CALL_RETRIES", 1))
+    for attempt in range(retries + 1):
+        try:
+            return await chain.ainvoke(input)
+        except TimeoutError as e:
+            if attempt == retries:
+                raise
+            logging.warning(f"{description} timed out, retrying ({attempt + 1}/{retries}): {e}")
+
+async def evaluate_chunks(chain: Runnable,
+                          chunks: List[DocumentChunk],
+                          quota: Optional[PositiveQuota] = None,
+                          progress: Optional[EvaluationProgress] = None) -> List[Optional[ClassificationDecision]]:
+    """
+    Evaluate chunks concurrently under the shared evaluator semaphore.
+
+    :param chain: The evaluator chain to invoke on each chunk.
+    :param chunks: The chunks to evaluate, in dispatch order.
+    :param quota: Optional positive quota. Once it is reached, chunks still waiting on the semaphore are skipped.
+    :param progress: Optional progress reporter, updated as each chunk completes.
+    :return: The decisions, in the same order as the chunks. Skipped chunks have no decision (None), and chunks
+        that still time out after LLM_CALL_RETRIES retries get an unevaluated decision.
+    """
+    async def _evaluate(chunk: DocumentChunk) -> Optional[ClassificationDecision]:
+        async with get_evaluator_semaphore():
+            if quota and quota.reached:
+                return None
+            try:
+                resp = await _invoke_with_retries(chain, chunk["content"], f"Chunk {chunk['chunk_number']}")
+            except TimeoutError as e:
+                logging.error(f"Chunk {chunk['chunk_number']} was not evaluated: {e}")
+                resp = _unevaluated(e)
+        if quota:
+            quota.record(resp)
+        if progress:
+            await progress.update([chunk], [resp])
+        return resp
 
+    return await asyncio.gather(*(_evaluate(chunk) for chunk in chunks))
+
+def pack_chunk_batches(chunks: List[DocumentChunk], token_budget: int) -> List[List[DocumentChunk]]:
+    """
+    Greedily pack consecutive chunks into batches whose formatted text fits the token budget.
+    A chunk that is larger than the budget on its own is placed in a batch by itself.
+
+    :param chunks: The chunks to pack, in dispatch order.
+    :param token_budget: The maximum number of chunk tokens per batch.
+    :return: The batches of chunks.
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for chunk in chunks:
+        chunk_tokens = num_tokens_from_string(_format_batch_chunk(chunk))
+        if batch and batch_tokens + chunk_tokens > token_budget:
+            batches += [batch]
+            batch, batch_tokens = [], 0
+        batch += [chunk]
+        batch_tokens += chunk_tokens
+    if batch:
+        batches += [batch]
+    return batches
+
+def _format_batch_chunk(chunk: DocumentChunk) -> str:
+    return f"### Chunk {chunk['chunk_number']}\n{chunk['content']}\n\n"
+
+async def evaluate_chunk_batches(batch_chain: Runnable,
+                                 chain: Runnable,
+                                 chunks: List[DocumentChunk],
+                                 token_budget: int,
+                                 quota: Optional[PositiveQuota] = None,
+                                 progress: Optional[EvaluationProgress] = None) -> List[Optional[ClassificationDecision]]:
+    """
+    Evaluate chunks in token-budgeted batches, one call per batch, under the shared evaluator semaphore.
+    Chunks that the model leaves out of a batch response, or whose batch call times out, are evaluated individually.
+
+    :param batch_chain: The evaluator chain returning the decisions for a batch, keyed by chunk number.
+    :param chain: The evaluator chain returning the decision for a single chunk.
+    :param chunks: The chunks to evaluate, in dispatch order.
+    :param token_budget: The maximum number of chunk tokens per batch.
+    :param quota: Optional positive quota. Once it is reached, batches still waiting on the semaphore are skipped.
+    :param progress: Optional progress reporter, updated as each batch completes.
+    :return: The decisions, in the same order as the chunks. Skipped chunks have no decision (None), and chunks
+        that still time out when evaluated individually get an unevaluated decision.
+    """
+    async def _evaluate(batch: List[DocumentChunk]) -> Optional[BatchClassificationDecision]:
+        async with get_evaluator_semaphore():
+            if quota and quota.reached:
+                return None
+            try:
+                resp = await batch_chain.ainvoke("".join(_format_batch_chunk(chunk) for chunk in batch))
+            except TimeoutError as e:
+                logging.warning(f"Batch of chunks {batch[0]['chunk_number']}-{batch[-1]['chunk_number']} timed out, "
+                                f"evaluating its chunks individually: {e}")
+                return {"decisions": []}
+        if quota:
+            for decision in resp["decisions"]:
+                quota.record(decision)
+        if progress:
+            returned = {decision["chunk_number"]: decision for decision in resp["decisions"]}
+            completed = [chunk for chunk in batch if chunk["chunk_number"] in returned]
+            await progress.update(completed, [returned[chunk["chunk_number"]] for chunk in completed])
+        return resp
+
+    batches = pack_chunk_batches(chunks, token_budget)
+    evaluated, decisions = set(), {}
+    for batch, resp in zip(batches, await asyncio.gather(*(_evaluate(batch) for batch in batches))):
+        if resp is None:
+            continue
+        evaluated.update(chunk["chunk_number"] for chunk in batch)
+        for decision in resp["decisions"]:
+            decisions[decision["chunk_number"]] = {key: value for key, value in decision.items()
+                                                   if key != "chunk_number"}
+
+    missing = [chunk for chunk in chunks
+               if chunk["chunk_number"] in evaluated and chunk["chunk_number"] not in decisions]
+    if missing:
+        logging.warning(f"{len(missing)} chunk(s) missing from batch responses, evaluating individually")
+        for chunk, resp in zip(missing, await evaluate_chunks(chain, missing, quota, progress)):
+            decisions[chunk["chunk_number"]] = resp
+
+    logging.info(f"Evaluated {len(evaluated)}/{len(chunks)} chunks in batch call(s)")
+    return [decisions.get(chunk["chunk_number"]) for chunk in chunks]
+
+def get_criteria_store():
     topChunks = os.environ.get("TOP_CHUNKS", 3)
     topCommunities = os.environ.get("TOP_COMMUNITIES", 3)
     topInsideRels = os.environ.get("TOP_INSIDE_RELS", 10)
     topOutsideRels = os.environ.get("TOP_OUTSIDE_RELS", 10)
+    return neo4j_vector_generator(topChunks, topCommunities, topOutsideRels, topInsideRels)
 
-    search_client = get_search_client()
-    store = neo4j_vector_generator(topChunks, topCommunities, topOutsideRels, topInsideRels)
-    llm = llm_generator()
+CRITERIA_PROMPTS = {
+    "top_secret": get_ts_details_prompt,
+    "secret": get_s_details_prompt,
+    "unclassified": get_unclass_details_prompt,
+}
+
+async def get_criteria_context(level: str, llm, store) -> str:
+    """
+    Retrieve the classification criteria for a level from the SCG knowledge graph.
+    Contexts are cached per graph build version and model deployment, so the retrieval
+    only runs again after the graph is rebuilt.
+
+    :param level: The classification level, one of top_secret | secret | unclassified.
+    :param llm: The language model used to summarize the retrieved criteria.
+    :param store: The Neo4j vector store over the SCG knowledge graph.
+    :return: The criteria context for the level.
+    """
+    cache = get_criteria_cache()
+    graph_version = await asyncio.to_thread(get_graph_build_version, store)
+    deployment = get_llm_deployment_name()
+    ctx = cache.get(level, graph_version, deployment)
+    if ctx is not None:
+        return ctx
 
     graph_chain = RetrievalQA.from_chain_type(
         llm, chain_type="stuff", retriever=store.as_retriever()
     )
-    
-    ctx = await graph_chain.ainvoke({"query":get_ts_details_prompt}, 
+
+    ctx = await graph_chain.ainvoke({"query":CRITERIA_PROMPTS[level]}, 
                               return_only_outputs=True)
-    top_secret_agent_chain = (
-        {
-            "context": lambda x: ctx['result'],
-            "content": RunnablePassthrough()
-        }
-        | ts_evaluator_prompt
-        | llm.with_structured_output(ClassificationDecision)
-    )
+    cache.put(level, graph_version, deployment, ctx['result'])
+    return ctx['result']
+
+def criteria_reference_inputs(criteria_contexts: dict) -> dict:
+    """
+    Prompt inputs for the shared criteria reference that opens every evaluator and authority prompt, 
+    followed by the content passed through.
+
+    :param criteria_contexts: The criteria context of each level, keyed top_secret | secret | unclassified.
+    """
+    return {
+        "top_secret_context": lambda x: criteria_contexts["top_secret"],
+        "secret_context": lambda x: criteria_contexts["secret"],
+        "unclassified_context": lambda x: criteria_contexts["unclassified"],
+        "content": RunnablePassthrough()
+    }
+
+def criteria_reference_key(criteria_contexts: dict) -> str:
+    """The criteria reference as a single string, used to key cached verdicts"""
+    return "\n".join([criteria_contexts["top_secret"], criteria_contexts["secret"], criteria_contexts["unclassified"]])
+
+def has_criteria_subsets(chunks: List[DocumentChunk]) -> bool:
+    """Whether the orchestrator attached per-chunk criteria, see CRITERIA_SUBSET_TOP_K"""
+    return any("criteria" in chunk for chunk in chunks)
+
+def criteria_subset_inputs(chunks: List[DocumentChunk]) -> dict:
+    """
+    Prompt inputs for the per-chunk criteria subset, looked up by the chunk content passed through.
+
+    :param chunks: The chunks to evaluate, each with its "criteria".
+    """
+    criteria = {chunk["content"]: chunk.get("criteria", "") for chunk in chunks}
+    return {
+        "criteria": lambda x: criteria.get(x, ""),
+        "content": RunnablePassthrough()
+    }
 
-    positive_decisions = []
+def criteria_subset_key(criteria_contexts: dict) -> str:
+    """
+    Key for verdicts cached against per-chunk criteria. A chunk's criteria are determined by its content 
+    and the SCG graph, which the level criteria contexts are retrieved from.
+    """
+    return f"criteria_subset:{os.environ.get('CRITERIA_SUBSET_TOP_K')}\n" + criteria_reference_key(criteria_contexts)
+
+async def fetch_document_chunks(doc_name: str) -> List[DocumentChunk]:
+    """
+    Retrieve every indexed chunk of a document from Azure AI Search, in chunk order, with the page 
+    and section level from its metadata. The chunks are selected with a $filter on doc_name, and the 
+    vector fields are not retrieved.
+
+    :param doc_name: The name of the document.
+    :return: The chunks of the document.
+    """
+    chunks = []
+    search_client = get_search_client()
     async with search_client:
-        results = await search_client.search(search_text=state['ctx_doc'])
+        results = await search_client.search(search_text="*",
+                                             filter=f"doc_name eq '{_escape_odata(doc_name)}'",
+                                             select=["chunk_number", "content", "metadata"],
+                                             order_by=["chunk_number asc"])
         async for result in results:
-            metadata = ast.literal_eval(result["metadata"])
-            if metadata["doc_name"] != state['ctx_doc']:
-                continue
-            resp = await top_secret_agent_chain.ainvoke(result["content"])
-            if resp["classification"] == "Top Secret":
-                positive_decisions += [{**resp, "original_content": result['content']}]
-
-    state['classification_analysis'] += [("top_secret_expert_agent", positive_decisions)]
-    state["logs"].append({
-        "message": f"Top Secret Evaluator agent is analyzing...",
-        "done": True
-    })
- 
-    #await copilotkit_emit_state(config, state)
-
-    return state
+            metadata = json.loads(result.get("metadata") or "{}")
+            chunks += [{
+                "chunk_number": result["chunk_number"], 
+                "content": result["content"],
+                "page": metadata.get("page"),
+                "level": metadata.get("level")
+            }]
+    return chunks
 
-async def s_evaluator(state: ExpertAnalysisState, config: RunnableConfig):
-    state["logs"].append({
-        "message": f"Secret Evaluator agent is analyzing...",
-        "done": False
-    })
- 
-    #await copilotkit_emit_state(config, state)
+def _escape_odata(value: str) -> str:
+    return value.replace("'", "''")
 
-    topChunks = os.environ.get("TOP_CHUNKS", 3)
-    topCommunities = os.environ.get("TOP_COMMUNITIES", 3)
-    topInsideRels = os.environ.get("TOP_INSIDE_RELS", 10)
-    topOutsideRels = os.environ.get("TOP_OUTSIDE_RELS", 10)
+async def _evaluate_document(evaluator: str,
+                             context: str,
+                             agent_chain: Runnable,
+                             batch_agent_chain: Optional[Runnable],
+                             chunks: List[DocumentChunk],
+                             quota: Optional[PositiveQuota] = None,
+                             progress: Optional[EvaluationProgress] = None) -> list:
+    cache = get_verdict_cache()
+    deployment = get_llm_deployment_name()
+    keys = [cache.key(evaluator, chunk["content"], context, deployment) for chunk in chunks]
+    verdicts = cache.get_many(keys)
+    pending = [chunk for chunk, key in zip(chunks, keys) if key not in verdicts]
+    pending_keys = [key for key in keys if key not in verdicts]
+    logging.info(f"{evaluator}: {len(chunks) - len(pending)}/{len(chunks)} chunk verdicts served from cache ({cache.stats()})")
+    if quota:
+        for verdict in verdicts.values():
+            quota.record(verdict)
+    if progress:
+        cached = [chunk for chunk, key in zip(chunks, keys) if key in verdicts]
+        await progress.update(cached, [verdicts[key] for key in keys if key in verdicts])
 
-    search_client = get_search_client()
-    store = neo4j_vector_generator(topChunks, topCommunities, topOutsideRels, topInsideRels)
-    llm = llm_generator()
+    batch_token_budget = int(os.environ.get("EVALUATOR_BATCH_TOKEN_BUDGET", 0))
+    if not pending or (quota and quota.reached):
+        decisions = [None] * len(pending)
+    elif batch_token_budget > 0 and batch_agent_chain is not None:
+        decisions = await evaluate_chunk_batches(batch_agent_chain, agent_chain, pending, batch_token_budget, quota, progress)
+    else:
+        decisions = await evaluate_chunks(agent_chain, pending, quota, progress)
 
-    graph_chain = RetrievalQA.from_chain_type(
-        llm, chain_type="stuff", retriever=store.as_retriever()
+    # Unevaluated decisions are returned so the chunks are reported as not covered, but never cached
+    evaluated = dict(zip(pending_keys, decisions))
+    cache.put_many({key: decision for key, decision in evaluated.items()
+                    if decision is not None and not decision.get("unevaluated")})
+    return [verdicts[key] if key in verdicts else evaluated.get(key) for key in keys]
+
+def _positive_decisions(chunks: List[DocumentChunk], decisions: list, positive_labels: List[str]) -> list:
+    return sorted([{**resp, "chunk_number": member["chunk_number"], "original_content": member["content"]}
+                   for chunk, resp in zip(chunks, decisions)
+                   if resp is not None and resp["classification"] in positive_labels
+                   for member in expand_duplicates(chunk)],
+                  key=lambda decision: decision["chunk_number"])
+
+def _unevaluated_chunks(chunks: List[DocumentChunk], decisions: list) -> List[int]:
+    """The numbers of the chunks, with their duplicates, that could not be evaluated"""
+    return sorted(member["chunk_number"]
+                  for chunk, resp in zip(chunks, decisions)
+                  if resp is not None and resp.get("unevaluated")
+                  for member in expand_duplicates(chunk))
+
+def _scheduled_chunks(state: ExpertAnalysisState, schedule_key: str) -> List[DocumentChunk]:
+    """The chunks to evaluate in dispatch order, most suspicious first when a similarity schedule was computed"""
+    schedule = (state.get("chunk_schedule") or {}).get(schedule_key)
+    if not schedule:
+        return state["chunks"]
+    rank = {chunk_number: i for i, chunk_number in enumerate(schedule)}
+    return sorted(state["chunks"], key=lambda chunk: rank.get(chunk["chunk_number"], len(rank)))
+
+def _triaged_decisions(state: ExpertAnalysisState) -> list:
+    threshold = os.environ.get("TRIAGE_SIMILARITY_THRESHOLD")
+    return [{
+                "classification": "Unclassified",
+                "explanation": f"Marked Unclassified by triage without LLM evaluation: the chunk's similarity "
+                               f"to the SCG criteria ({triaged['similarity']:.2f}) is below the threshold ({threshold}).",
+                "chunk_number": chunk["chunk_number"],
+                "original_content": chunk["content"],
+                "similarity": triaged["similarity"]
+            } for triaged in state.get("triaged_chunks") or []
+              for chunk in expand_duplicates(triaged)]
+
+def _settled_decisions(state: ExpertAnalysisState, positive_labels: List[str]) -> list:
+    """Decisions settled before evaluation, by explicit markings or by a quick scan's sample"""
+    return [decision for decision in (state.get("marked_chunks") or []) + (state.get("sampled_chunks") or [])
+            if decision["classification"] in positive_labels]
+
+EVALUATOR_LEVELS = {
+    "top_secret": {
+        "agent_name": "top_secret_expert_agent",
+        "display_name": "Top Secret",
+        "evaluator_prompt": ts_evaluator_prompt,
+        "subset_evaluator_prompt": ts_subset_evaluator_prompt,
+        "batch_evaluator_prompt": ts_batch_evaluator_prompt,
+        "label_evaluator_prompt": ts_label_evaluator_prompt,
+        "batch_label_evaluator_prompt": ts_batch_label_evaluator_prompt,
+        "positive_labels": ["Top Secret"]
+    },
+    "secret": {
+        "agent_name": "secret_expert_agent",
+        "display_name": "Secret",
+        "evaluator_prompt": s_evaluator_prompt,
+        "subset_evaluator_prompt": s_subset_evaluator_prompt,
+        "batch_evaluator_prompt": s_batch_evaluator_prompt,
+        "label_evaluator_prompt": s_label_evaluator_prompt,
+        "batch_label_evaluator_prompt": s_batch_label_evaluator_prompt,
+        "positive_labels": ["Secret"]
+    },
+    "unclassified": {
+        "agent_name": "unclass_expert_agent",
+        "display_name": "Unclass",
+        "evaluator_prompt": unclass_evaluator_prompt,
+        "subset_evaluator_prompt": unclass_subset_evaluator_prompt,
+        "batch_evaluator_prompt": unclass_batch_evaluator_prompt,
+        "label_evaluator_prompt": unclass_label_evaluator_prompt,
+        "batch_label_evaluator_prompt": unclass_batch_label_evaluator_prompt,
+        "positive_labels": ["Unclassified", "CUI"]
+    },
+}
+
+async def _evaluate_level(state: ExpertAnalysisState,
+                          config: RunnableConfig,
+                          level: str,
+                          stop_after_positives: Optional[int] = None) -> list:
+    """
+    Evaluate the document's chunks against one classification level.
+
+    :param state: The classification analysis state holding the chunks and criteria contexts.
+    :param config: The runnable config, used to stream progress to the UI.
+    :param level: The classification level, one of top_secret | secret | unclassified.
+    :param stop_after_positives: Stop evaluating once this many positives are found. Evaluates every chunk if None.
+    :return: The positive decisions for the level, and the numbers of the chunks that could not be evaluated.
+    """
+    spec = EVALUATOR_LEVELS[level]
+    llm, hedge_llm = llm_generator(), hedge_llm_generator()
+    if has_criteria_subsets(state["chunks"]):
+        # Chunks with different criteria cannot share a batch prompt, so each is evaluated on its own
+        ctx = criteria_subset_key(state["criteria_contexts"])
+        agent_chain = (
+            criteria_subset_inputs(state["chunks"])
+            | spec["subset_evaluator_prompt"]
+            | with_hedging(llm.with_structured_output(ClassificationDecision),
+                           hedge_llm.with_structured_output(ClassificationDecision),
+                           "evaluator")
+        )
+        batch_agent_chain = None
+    else:
+        ctx = criteria_reference_key(state["criteria_contexts"])
+        agent_chain = (
+            criteria_reference_inputs(state["criteria_contexts"])
+            | spec["evaluator_prompt"]
+            | with_hedging(llm.with_structured_output(ClassificationDecision),
+                           hedge_llm.with_structured_output(ClassificationDecision),
+                           "evaluator")
+        )
+        batch_agent_chain = (
+            criteria_reference_inputs(state["criteria_contexts"])
+            | spec["batch_evaluator_prompt"]
+            | with_hedging(llm.with_structured_output(BatchClassificationDecision),
+                           hedge_llm.with_structured_output(BatchClassificationDecision),
+                           "evaluator")
+        )
+
+    chunks = _scheduled_chunks(state, level)
+    quota = PositiveQuota(spec["positive_labels"], stop_after_positives)
+    progress = EvaluationProgress(config, state, spec["display_name"], len(chunks), spec["positive_labels"])
+    await progress.start()
+    if os.environ.get("EVALUATOR_TWO_PHASE", "false").lower() == "true":
+        decisions = await _evaluate_two_phase(state, spec, ctx, agent_chain, batch_agent_chain, chunks, quota, progress)
+    else:
+        decisions = await _evaluate_document(spec["agent_name"], ctx, agent_chain, batch_agent_chain, chunks, quota, progress)
+    await progress.finish()
+    positive_decisions = (_positive_decisions(chunks, decisions, spec["positive_labels"])
+                          + _settled_decisions(state, spec["positive_labels"]))
+    if level == "unclassified":
+        positive_decisions += _triaged_decisions(state)
+    return positive_decisions, _unevaluated_chunks(chunks, decisions)
+
+async def _evaluate_two_phase(state: ExpertAnalysisState,
+                              spec: dict,
+                              context: str,
+                              agent_chain: Runnable,
+                              batch_agent_chain: Optional[Runnable],
+                              chunks: List[DocumentChunk],
+                              quota: Optional[PositiveQuota] = None,
+                              progress: Optional[EvaluationProgress] = None) -> list:
+    """
+    Label every chunk with a cheap label-only call capped at EVALUATOR_LABEL_MAX_TOKENS output tokens, then 
+    generate the full decision with its explanation only for the chunks labelled positive at the level.
+
+    :return: The decisions, aligned with the chunks. Chunks that are not positive have no decision (None),
+        and chunks whose label or explanation could not be generated keep an unevaluated decision.
+    """
+    label_llm = llm_generator(max_tokens=int(os.environ.get("EVALUATOR_LABEL_MAX_TOKENS", 32)))
+    hedge_label_llm = hedge_llm_generator(max_tokens=int(os.environ.get("EVALUATOR_LABEL_MAX_TOKENS", 32)))
+    llm, hedge_llm = llm_generator(), hedge_llm_generator()
+    label_chain = (
+        criteria_reference_inputs(state["criteria_contexts"])
+        | spec["label_evaluator_prompt"]
+        | with_hedging(label_llm.with_structured_output(ClassificationLabel),
+                       hedge_label_llm.with_structured_output(ClassificationLabel),
+                       "evaluator_label")
     )
-    
-    ctx = await graph_chain.ainvoke({"query":get_s_details_prompt}, 
-                              return_only_outputs=True)
-    secret_agent_chain = (
-        {
-            "context": lambda x: ctx['result'],
-            "content": RunnablePassthrough()
-        }
-        | s_evaluator_prompt
-        | llm.with_structured_output(ClassificationDecision)
+    # Batch responses hold one label per chunk, so they are not held to the single label cap
+    batch_label_chain = (
+        criteria_reference_inputs(state["criteria_contexts"])
+        | spec["batch_label_evaluator_prompt"]
+        | with_hedging(llm.with_structured_output(BatchClassificationLabel),
+                       hedge_llm.with_structured_output(BatchClassificationLabel),
+                       "evaluator_label")
     )
 
-    positive_decisions = []
-    async with search_client:
-        results = await search_client.search(search_text=state['ctx_doc'])
-        async for result in results:
-            metadata = ast.literal_eval(result["metadata"])
-            if metadata["doc_name"] != state['ctx_doc']:
-                continue
-            resp = await secret_agent_chain.ainvoke(result["content"])
-            if resp["classification"] == "Secret":
-                positive_decisions += [{**resp, "original_content": result['content']}]
-
-    state['classification_analysis'] += [("secret_expert_agent", positive_decisions)]
-    state["logs"].append({
-        "message": f"Secret Evaluator agent is analyzing...",
-        "done": True
-    })
- 
-    #await copilotkit_emit_state(config, state)
-
-    return state
+    # Label calls keep the full criteria reference, whose shared prefix is served from the prompt cache
+    label_context = criteria_reference_key(state["criteria_contexts"])
+    labels = await _evaluate_document(f"{spec['agent_name']}_label", label_context, label_chain, batch_label_chain,
+                                      chunks, quota, progress)
+    positives = [chunk for chunk, label in zip(chunks, labels)
+                 if label is not None and label["classification"] in spec["positive_labels"]]
+    logging.info(f"{spec['display_name']} labelled {len(positives)}/{len(chunks)} chunk(s) positive, explaining them")
+    explained = await _evaluate_document(spec["agent_name"], context, agent_chain, batch_agent_chain, positives)
+    decisions = {chunk["chunk_number"]: decision for chunk, decision in zip(positives, explained)}
+    decisions.update({chunk["chunk_number"]: label for chunk, label in zip(chunks, labels)
+                      if label is not None and label.get("unevaluated")})
+    return [decisions.get(chunk["chunk_number"]) for chunk in chunks]
+
+async def _run_evaluator(state: ExpertAnalysisState, config: RunnableConfig, level: str) -> dict:
+    spec = EVALUATOR_LEVELS[level]
+    # The scatter evaluators run concurrently on the same state, so each returns its own log entries
+    # rather than appending to the shared state["logs"]
+    message = f"{spec['display_name']} Evaluator agent is analyzing..."
+
+    positive_decisions, unevaluated = await _evaluate_level(state, config, level)
+
+    return {
+        "classification_analysis": [(spec["agent_name"], positive_decisions)],
+        "unevaluated_chunks": unevaluated,
+        "logs": [{"message": message, "done": False}, {"message": message, "done": True}]
+    }
+
+async def ts_evaluator(state: ExpertAnalysisState, config: RunnableConfig):
+    return await _run_evaluator(state, config, "top_secret")
+
+async def s_evaluator(state: ExpertAnalysisState, config: RunnableConfig):
+    return await _run_evaluator(state, config, "secret")
 
 async def unclass_evaluator(state: ExpertAnalysisState, config: RunnableConfig):
-    state["logs"].append({
-        "message": f"Unclass Evaluator agent is analyzing...",
-        "done": False
-    })
- 
-    #await copilotkit_emit_state(config, state)
+    return await _run_evaluator(state, config, "unclassified")
 
-    topChunks = os.environ.get("TOP_CHUNKS", 3)
-    topCommunities = os.environ.get("TOP_COMMUNITIES", 3)
-    topInsideRels = os.environ.get("TOP_INSIDE_RELS", 10)
-    topOutsideRels = os.environ.get("TOP_OUTSIDE_RELS", 10)
+async def cascade_evaluator(state: ExpertAnalysisState, config: RunnableConfig):
+    """
+    Evaluate the levels from highest to lowest, since the document takes the highest level found anywhere.
+    A level stops early once CASCADE_CONFIRMATION_COUNT positives confirm it, by default as many as the
+    authority rules need to decide the level (AUTHORITY_RULE_MIN_POSITIVES), and lower levels are
+    only evaluated when every higher level comes back negative.
+    """
+    confirmations = int(os.environ.get("CASCADE_CONFIRMATION_COUNT", os.environ.get("AUTHORITY_RULE_MIN_POSITIVES", 2)))
+    analysis, logs, unevaluated = [], [], []
+    for level in ["top_secret", "secret", "unclassified"]:
+        spec = EVALUATOR_LEVELS[level]
+        if any(decisions for _, decisions in analysis):
+            analysis += [(spec["agent_name"], [])]
+            continue
 
-    search_client = get_search_client()
-    store = neo4j_vector_generator(topChunks, topCommunities, topOutsideRels, topInsideRels)
-    llm = llm_generator()
+        message = f"{spec['display_name']} Evaluator agent is analyzing..."
+        stop_after_positives = None if level == "unclassified" else confirmations
+        positive_decisions, level_unevaluated = await _evaluate_level(state, config, level, stop_after_positives)
+        analysis += [(spec["agent_name"], positive_decisions)]
+        unevaluated += level_unevaluated
+        logs += [{"message": message, "done": False}, {"message": message, "done": True}]
 
-    graph_chain = RetrievalQA.from_chain_type(
-        llm, chain_type="stuff", retriever=store.as_retriever()
-    )
-    
-    ctx = await graph_chain.ainvoke({"query":get_unclass_details_prompt}, 
-                              return_only_outputs=True)
-    unclass_agent_chain = (
-        {
-            "context": lambda x: ctx['result'],
-            "content": RunnablePassthrough()
-        }
-        | unclass_evaluator_prompt
-        | llm.with_structured_output(ClassificationDecision)
-    )
+    confirmed = next((name for name, decisions in analysis if decisions), None)
+    logging.info(f"Cascade evaluated {len(logs) // 2} level(s), confirmed by {confirmed}")
 
-    positive_decisions = []
-    async with search_client:
-        results = await search_client.search(search_text=state['ctx_doc'])
-        async for result in results:
-            metadata = ast.literal_eval(result["metadata"])
-            if metadata["doc_name"] != state['ctx_doc']:
-                continue
-            resp = await unclass_agent_chain.ainvoke(result["content"])
-            if resp["classification"] == "Unclassified" or resp['classification'] == "CUI":
-                positive_decisions += [{**resp, "original_content": result['content']}]
-
-    state['classification_analysis'] += [("unclass_expert_agent", positive_decisions)]
-    state["logs"].append({
-        "message": f"Unclass Evaluator agent is analyzing...",
-        "done": True
-    })
- 
-    #await copilotkit_emit_state(config, state)
-
-    return state
\ No newline at end of file
+    return {
+        "classification_analysis": analysis,
+        "unevaluated_chunks": unevaluated,
+        "logs": logs
+    }
+
+async def evaluate_tri_level(chunks: List[DocumentChunk],
+                             criteria_contexts: dict,
+                             progress: Optional[EvaluationProgress] = None) -> list:
+    """
+    Evaluate chunks for all three classification levels at once. Chunks carrying their own criteria 
+    subset are judged against it instead of the criteria contexts.
+
+    :param chunks: The chunks to evaluate.
+    :param criteria_contexts: The criteria context of each level, keyed top_secret | secret | unclassified.
+    :param progress: Reports the evaluated chunks to the UI.
+    :return: The decisions, aligned with the chunks.
+    """
+    llm, hedge_llm = llm_generator(), hedge_llm_generator()
+    if has_criteria_subsets(chunks):
+        context = criteria_subset_key(criteria_contexts)
+        agent_chain = (
+            criteria_subset_inputs(chunks)
+            | tri_level_subset_evaluator_prompt
+            | with_hedging(llm.with_structured_output(TriLevelClassificationDecision),
+                           hedge_llm.with_structured_output(TriLevelClassificationDecision),
+                           "evaluator")
+        )
+        batch_agent_chain = None
+    else:
+        context = criteria_reference_key(criteria_contexts)
+        contexts = criteria_reference_inputs(criteria_contexts)
+        agent_chain = (
+            contexts
+            | tri_level_evaluator_prompt
+            | with_hedging(llm.with_structured_output(TriLevelClassificationDecision),
+                           hedge_llm.with_structured_output(TriLevelClassificationDecision),
+                           "evaluator")
+        )
+        batch_agent_chain = (
+            contexts
+            | tri_level_batch_evaluator_prompt
+            | with_hedging(llm.with_structured_output(BatchTriLevelClassificationDecision),
+                           hedge_llm.with_structured_output(BatchTriLevelClassificationDecision),
+                           "evaluator")
+        )
+    return await _evaluate_document("tri_level_expert_agent",
+                                    context,
+                                    agent_chain,
+                                    batch_agent_chain,
+                                    chunks,
+                                    progress=progress)
+
+async def tri_level_evaluator(state: ExpertAnalysisState, config: RunnableConfig):
+    """
+    Evaluate every chunk for all three classification levels in a single pass, writing
+    the same expert analyses as the ts, s and unclass evaluators.
+    """
+    message = "Tri-Level Evaluator agent is analyzing..."
+    chunks = _scheduled_chunks(state, "tri_level")
+    progress = EvaluationProgress(config, state, "Tri-Level", len(chunks), ["Top Secret", "Secret"])
+    await progress.start()
+    decisions = await evaluate_tri_level(chunks, state["criteria_contexts"], progress)
+    await progress.finish()
+
+    return {
+        "classification_analysis": [
+            ("top_secret_expert_agent", _positive_decisions(chunks, decisions, ["Top Secret"])
+                                        + _settled_decisions(state, ["Top Secret"])),
+            ("secret_expert_agent", _positive_decisions(chunks, decisions, ["Secret"])
+                                    + _settled_decisions(state, ["Secret"])),
+            ("unclass_expert_agent", _positive_decisions(chunks, decisions, ["Unclassified", "CUI"])
+                                     + _settled_decisions(state, ["Unclassified", "CUI"])
+                                     + _triaged_decisions(state))
+        ],
+        "unevaluated_chunks": _unevaluated_chunks(chunks, decisions),
+        "logs": [{"message": message, "done": False}, {"message": message, "done": True}]
+    }
@@ -0,0 +1,112 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.state import DocumentChunk
+from .preprocessing import expand_duplicates
+from typing import List, Optional, Tuple
+from typing_extensions import TypedDict
+import re
+
+_CONTROLS = r"(?://[A-Z0-9][A-Z0-9 ,/-]*)?"
+# A portion marking opens its portion, so it cannot follow a word character as in NAME(S) or ITEM(S)
+_PORTION_MARKING = re.compile(rf"(?<!\w)\((TS|S|CUI|U|FOUO){_CONTROLS}\)")
+_BANNER_LINE = re.compile(rf"^[ \t]*(TOP SECRET|SECRET|CONTROLLED UNCLASSIFIED INFORMATION|CUI|UNCLASSIFIED){_CONTROLS}[ \t]*$",
+                          re.MULTILINE)
+
+_MARKING_LEVELS = {
+    "TS": "Top Secret",
+    "TOP SECRET": "Top Secret",
+    "S": "Secret",
+    "SECRET": "Secret",
+    "CUI": "CUI",
+    "CONTROLLED UNCLASSIFIED INFORMATION": "CUI",
+    "FOUO": "CUI",
+    "U": "Unclassified",
+    "UNCLASSIFIED": "Unclassified",
+}
+_LEVEL_RANK = {"Unclassified": 0, "CUI": 1, "Secret": 2, "Top Secret": 3}
+
+class Marking(TypedDict):
+    """A classification marking found in a chunk"""
+    classification: str
+    span: str
+    kind: str
+
+class MarkingSummary(TypedDict):
+    """The provisional document classification implied by its markings"""
+    classification: str
+    consistent: bool
+    banner: bool
+    marked_chunks: int
+    total_chunks: int
+    spans: List[str]
+
+def _marking_level(match: re.Match) -> str:
+    # Unclassified portions and banners with a FOUO control are controlled, not public
+    if "FOUO" in match.group(0) and match.group(1) in ("U", "UNCLASSIFIED"):
+        return "CUI"
+    return _MARKING_LEVELS[match.group(1)]
+
+def _highest(levels: List[str]) -> str:
+    return max(levels, key=lambda level: _LEVEL_RANK[level])
+
+def detect_markings(content: str) -> List[Marking]:
+    """
+    Find the portion markings, e.g. (TS), (S//NF), (U//FOUO), and banner lines, e.g. SECRET//NOFORN, in a chunk.
+
+    Args:
+        content (str): The chunk text.
+
+    Returns:
+        List[Marking]: The markings in order of appearance.
+    """
+    markings = [{"classification": _marking_level(m), "span": m.group(0).strip(), "kind": "banner", "start": m.start()}
+                for m in _BANNER_LINE.finditer(content)]
+    markings += [{"classification": _marking_level(m), "span": m.group(0), "kind": "portion", "start": m.start()}
+                 for m in _PORTION_MARKING.finditer(content)]
+    return [{key: marking[key] for key in ("classification", "span", "kind")}
+            for marking in sorted(markings, key=lambda marking: marking["start"])]
+
+def mark_chunks(chunks: List[DocumentChunk]) -> Tuple[list, List[DocumentChunk], Optional[MarkingSummary]]:
+    """
+    Classify chunks by their explicit markings, each marked chunk taking the highest level marked in it.
+    Markings are consistent when every banner agrees with the others and with the highest portion marking.
+    The summary also reports whether the document carries a banner line.
+
+    Args:
+        chunks (List[DocumentChunk]): The document chunks.
+
+    Returns:
+        Tuple[list, List[DocumentChunk], Optional[MarkingSummary]]: The decisions for marked chunks, fanned out to their 
+            duplicates, the unmarked chunks and the markings summary, None if the document carries no markings.
+    """
+    decisions, unmarked, banners, portions = [], [], set(), set()
+    for chunk in chunks:
+        markings = detect_markings(chunk["content"])
+        if not markings:
+            unmarked += [chunk]
+            continue
+
+        banners.update(m["classification"] for m in markings if m["kind"] == "banner")
+        portions.update(m["classification"] for m in markings if m["kind"] == "portion")
+        spans = list(dict.fromkeys(m["span"] for m in markings))
+        decisions += [{
+            "classification": _highest([m["classification"] for m in markings]),
+            "explanation": f"Classified by its explicit markings without LLM evaluation: {', '.join(spans)}",
+            "markings": spans,
+            "chunk_number": member["chunk_number"],
+            "original_content": member["content"]
+        } for member in expand_duplicates(chunk)]
+
+    if not decisions:
+        return [], unmarked, None
+
+    summary = {
+        "classification": _highest([decision["classification"] for decision in decisions]),
+        "consistent": len(banners) <= 1 and (not portions or not banners or banners == {_highest(list(portions))}),
+        "banner": bool(banners),
+        "marked_chunks": len(decisions),
+        "total_chunks": sum(len(expand_duplicates(chunk)) for chunk in chunks),
+        "spans": list(dict.fromkeys(span for decision in decisions for span in decision["markings"]))
+    }
+    return decisions, unmarked, summary
@@ -2,11 +2,276 @@
 # Licensed under the MIT License
 
 from sc_flow.agents.state import State, ExpertAnalysisState 
+from sc_flow.agents.evaluators.evaluators import get_criteria_context, get_criteria_store, fetch_document_chunks
+from sc_flow.agents.evaluators.triage import embed_chunks, schedule_chunks, triage_chunks
+from sc_flow.agents.evaluators.preprocessing import collapse_duplicate_chunks, expand_duplicates
+from sc_flow.agents.evaluators.markings import mark_chunks
+from sc_flow.agents.evaluators.quick_scan import quick_scan
+from sc_flow.agents.evaluators.criteria_subset import get_criteria_subset_store, subset_criteria
+from sc_flow.utils import llm_generator, embeddings_generator, get_blob_etag, num_tokens_from_string
+from sc_flow.utils.criteria_cache import get_graph_build_version
+from sc_flow.utils.result_store import get_document_result_store, content_hash
+from langgraph.graph import END
 from langgraph.types import Send
+from langchain_core.messages.ai import AIMessage
+from typing import Optional
+import asyncio
+import logging
+import os
 
-def classifier_orchestrator(state: State):
-    return {**state, "classification_analysis": []}
+MARKINGS_MODES = ["off", "provisional", "unmarked", "skip"]
 
-def agent_scatter(state: ExpertAnalysisState):
+CLASSIFIER_EVALUATORS = {
+    "scatter": ["ts_evaluator", "s_evaluator", "unclass_evaluator"],
+    "fused": ["tri_level_evaluator"],
+    "cascade": ["cascade_evaluator"],
+}
+
+def get_classifier_mode(classifier_mode: Optional[str] = None) -> str:
+    """
+    Resolve the classifier mode, falling back to the CLASSIFIER_MODE environment variable.
+
+    Args:
+        classifier_mode (Optional[str]): The requested mode, one of scatter | fused | cascade.
+
+    Returns:
+        str: The resolved classifier mode.
+    """
+    classifier_mode = classifier_mode or os.environ.get("CLASSIFIER_MODE", "scatter")
+    if classifier_mode not in CLASSIFIER_EVALUATORS:
+        raise ValueError(f"Invalid classifier mode, options are: {' | '.join(CLASSIFIER_EVALUATORS)}")
+    return classifier_mode
+
+def get_evaluation_mode(classifier_mode: Optional[str] = None) -> str:
+    """
+    Describe the settings that decide how much of a document is evaluated, which stored results are keyed by.
+
+    Args:
+        classifier_mode (Optional[str]): The requested classifier mode, see get_classifier_mode.
+
+    Returns:
+        str: The evaluation mode.
+    """
+    return (f"{get_classifier_mode(classifier_mode)}"
+            f";markings={os.environ.get('MARKINGS_MODE', 'provisional')}"
+            f";quick_scan={os.environ.get('QUICK_SCAN', 'false').lower()}"
+            f";triage={float(os.environ.get('TRIAGE_SIMILARITY_THRESHOLD', 0))}")
+
+async def classifier_orchestrator(state: State, classifier_mode: Optional[str] = None):
+    """
+    Return the stored classification when the document, identified by its blob ETag or content hash, 
+    and the SCG graph are unchanged since it was last classified with the same evaluation mode, 
+    unless a re-run was requested.
+    Otherwise fetch the document's chunks once, overlapped with the criteria retrievals for every level,
+    so that all evaluators share one search round trip and see the same chunk set. A document without
+    indexed chunks is not classified.
+    Documents within SHORT_DOCUMENT_TOKEN_BUDGET tokens are classified in a single whole-document call.
+    Identical and near-identical chunks are collapsed so one representative per group is evaluated.
+    Explicit portion markings and banner lines give an immediate provisional classification. When the markings
+    are consistent, depending on MARKINGS_MODE marked chunks are not evaluated (unmarked) or, if the document 
+    also carries a banner or every chunk is marked, no chunks are evaluated at all (skip).
+    With QUICK_SCAN set, only a stratified sample of the chunks is evaluated for a provisional label, 
+    escalating to a full scan when the sample finds content above Unclassified.
+    When TRIAGE_SIMILARITY_THRESHOLD is set, chunks dissimilar to every SCG criteria entity are
+    set aside as Unclassified before any LLM evaluation.
+    With EVALUATOR_SCHEDULING=similarity, each level evaluates the chunks most similar to its criteria first.
+    With CRITERIA_SUBSET_TOP_K set, each chunk left to evaluate gets only the top-k SCG criteria nearest to it
+    for its prompt, in place of the full criteria of every level.
+    """
+    llm = llm_generator()
+    store = get_criteria_store()
+    result_store = get_document_result_store()
+    rerun = state.get("rerun_classification", False)
+    evaluation_mode = get_evaluation_mode(classifier_mode)
+    retrievals = asyncio.gather(
+        get_criteria_context("top_secret", llm, store),
+        get_criteria_context("secret", llm, store),
+        get_criteria_context("unclassified", llm, store),
+        fetch_document_chunks(state["ctx_doc"])
+    )
+    etag, graph_version = await asyncio.gather(
+        asyncio.to_thread(get_blob_etag, state["ctx_doc"]),
+        asyncio.to_thread(get_graph_build_version, store)
+    )
+    stored = result_store.get(state["ctx_doc"], etag, graph_version, evaluation_mode) if etag and not rerun else None
+    if stored:
+        retrievals.cancel()
+        return _stored_result_update(state["ctx_doc"], stored)
+
+    ts_ctx, s_ctx, unclass_ctx, chunks = await retrievals
+    logging.info(f"Fetched {len(chunks)} chunks for {state['ctx_doc']}")
+    if not chunks:
+        return _no_chunks_update(state["ctx_doc"])
+    total_chunks = len(chunks)
+    version = etag or content_hash([chunk["content"] for chunk in chunks])
+    stored = result_store.get(state["ctx_doc"], version, graph_version, evaluation_mode) if not etag and not rerun else None
+    if stored:
+        return _stored_result_update(state["ctx_doc"], stored)
+
+    criteria_contexts = {
+        "top_secret": ts_ctx,
+        "secret": s_ctx,
+        "unclassified": unclass_ctx
+    }
+    document_version = {
+        "doc_name": state["ctx_doc"],
+        "version": version,
+        "graph_version": graph_version,
+        "evaluation_mode": evaluation_mode
+    }
+
+    short_document_budget = int(os.environ.get("SHORT_DOCUMENT_TOKEN_BUDGET", 0))
+    if short_document_budget > 0 and chunks:
+        document_tokens = num_tokens_from_string("\n".join(chunk["content"] for chunk in chunks))
+        if document_tokens <= short_document_budget:
+            logging.info(f"{state['ctx_doc']} has {document_tokens} tokens, classifying it in a single call")
+            return {
+                "classification_analysis": [],
+                "chunks": chunks,
+                "criteria_contexts": criteria_contexts,
+                "document_version": document_version,
+                "coverage": {"total_chunks": total_chunks, "covered_chunks": total_chunks},
+                "unevaluated_chunks": None,
+                "stored_result": None,
+                "short_document": True,
+                "logs": [{
+                    "message": f"Short document ({document_tokens} tokens), classifying it in a single call",
+                    "done": True
+                }]
+            }
+
+    logs, triaged = [], []
+    if os.environ.get("DEDUP_CHUNKS", "true").lower() == "true":
+        total = len(chunks)
+        chunks = collapse_duplicate_chunks(chunks)
+        if len(chunks) < total:
+            logs += [{
+                "message": f"Collapsed {total - len(chunks)} duplicate or boilerplate chunks out of {total}",
+                "done": True
+            }]
+
+    marked, provisional = [], None
+    markings_mode = os.environ.get("MARKINGS_MODE", "provisional")
+    if markings_mode not in MARKINGS_MODES:
+        raise ValueError(f"Invalid markings mode, options are: {' | '.join(MARKINGS_MODES)}")
+    if markings_mode != "off":
+        marked, unmarked, summary = mark_chunks(chunks)
+        if summary:
+            logs += [{
+                "message": f"Markings indicate {summary['classification']} (provisional, "
+                           f"{'consistent' if summary['consistent'] else 'inconsistent'}, "
+                           f"{summary['marked_chunks']}/{summary['total_chunks']} chunks marked): "
+                           f"{', '.join(summary['spans'][:10])}",
+                "done": True
+            }]
+        consistent = summary is not None and summary["consistent"]
+        fully_marked = consistent and (summary["banner"] or summary["marked_chunks"] == summary["total_chunks"])
+        if markings_mode == "skip" and fully_marked:
+            logging.info(f"Consistent markings on {state['ctx_doc']}, skipping LLM evaluation")
+            provisional = (f"provisional, from the explicit markings of "
+                           f"{summary['marked_chunks']}/{summary['total_chunks']} chunks")
+            chunks = []
+        elif markings_mode in ("unmarked", "skip") and consistent:
+            chunks = unmarked
+        else:
+            marked = []
+
+    schedule, embedded = {}, {}
+    embeddings = embeddings_generator()
+    threshold = float(os.environ.get("TRIAGE_SIMILARITY_THRESHOLD", 0))
+    scheduling = os.environ.get("EVALUATOR_SCHEDULING", "document")
+    if (threshold > 0 or scheduling == "similarity") and chunks:
+        chunk_embeddings = await embed_chunks(chunks, embeddings)
+        embedded = {chunk["chunk_number"]: vector for chunk, vector in zip(chunks, chunk_embeddings)}
+        if scheduling == "similarity":
+            schedule = await schedule_chunks(chunks, chunk_embeddings, criteria_contexts, embeddings)
+
+    if threshold > 0 and chunks:
+        total = len(chunks)
+        chunks, triaged = await triage_chunks(chunks, chunk_embeddings, store, threshold)
+        logs += [{
+            "message": f"Triage marked {len(triaged)}/{total} chunks Unclassified without LLM evaluation",
+            "done": True
+        }]
+
+    sampled = []
+    if os.environ.get("QUICK_SCAN", "false").lower() == "true" and chunks:
+        sampled, scan = await quick_scan(chunks, criteria_contexts)
+        scan_coverage = (f"{scan['sampled_chunks']}/{scan['total_chunks']} chunks across "
+                         f"{scan['sampled_pages']}/{scan['total_pages']} pages")
+        if scan["escalate"]:
+            logs += [{
+                "message": f"Quick scan found {scan['classification']} content in {scan_coverage}, escalating to a full scan",
+                "done": True
+            }]
+            sampled = []
+        else:
+            logs += [{
+                "message": f"Quick scan provisionally {scan['classification']}, coverage {scan_coverage}",
+                "done": True
+            }]
+            provisional = f"provisional, {scan_coverage}"
+            chunks = []
+
+    criteria_top_k = int(os.environ.get("CRITERIA_SUBSET_TOP_K", 0))
+    if criteria_top_k > 0 and chunks:
+        chunks = await subset_criteria(chunks, embedded, embeddings, get_criteria_subset_store(), criteria_top_k)
+
+    # Every chunk is covered by an evaluation, a marking, triage or a duplicate, except those 
+    # left out by a quick scan's sample or by skipping evaluation on the strength of markings
+    covered_chunks = (sum(len(expand_duplicates(chunk)) for chunk in chunks + triaged)
+                      + len(marked) + len(sampled))
+    return {
+        "classification_analysis": [],
+        "chunks": chunks,
+        "coverage": {"total_chunks": total_chunks, "covered_chunks": covered_chunks, "provisional": provisional},
+        "triaged_chunks": triaged,
+        "marked_chunks": marked,
+        "logs": logs,
+        "sampled_chunks": sampled,
+        "chunk_schedule": schedule,
+        "unevaluated_chunks": None,
+        "stored_result": None,
+        "short_document": False,
+        "document_version": document_version,
+        "criteria_contexts": criteria_contexts
+    }
+
+def _stored_result_update(doc_name: str, stored: dict) -> dict:
+    logging.info(f"Returning the stored classification of {doc_name} from {stored['timestamp']}")
+    return {
+        "classification_analysis": [],
+        "unevaluated_chunks": None,
+        "stored_result": stored,
+        "logs": [{
+            "message": f"Found a stored classification of {doc_name} from {stored['timestamp']}",
+            "done": True
+        }]
+    }
+
+def _no_chunks_update(doc_name: str) -> dict:
+    logging.warning(f"No indexed chunks found for {doc_name}, it is not classified")
+    return {
+        "classification_analysis": [],
+        "chunks": [],
+        "coverage": {"total_chunks": 0, "covered_chunks": 0},
+        "unevaluated_chunks": None,
+        "stored_result": None,
+        "short_document": False,
+        "messages": [AIMessage(content=f"No indexed chunks were found for {doc_name}, so it cannot be classified. "
+                                       f"Check that the right document is selected and that it has been indexed.")],
+        "logs": [{
+            "message": f"No indexed chunks found for {doc_name}",
+            "done": True
+        }]
+    }
+
+def agent_scatter(state: ExpertAnalysisState, classifier_mode: Optional[str] = None):
+    if state.get("stored_result"):
+        return "stored_classification"
+    if state.get("short_document"):
+        return "document_evaluator"
+    if not (state.get("coverage") or {}).get("total_chunks"):
+        return END
     return [Send(classifier, state) 
-            for classifier in ["ts_evaluator", "s_evaluator", "unclass_evaluator"]]
+            for classifier in CLASSIFIER_EVALUATORS[get_classifier_mode(classifier_mode)]]
@@ -0,0 +1,88 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.state import DocumentChunk
+from typing import List, Set
+import logging
+import re
+import os
+
+_PAGE_NUMBERS = re.compile(r"\bpage\s+\d+(\s+of\s+\d+)?\b|^\W*\d+\W*$", re.IGNORECASE | re.MULTILINE)
+_DIGITS = re.compile(r"\d+")
+_DATE_LINE = re.compile(r"^\W*(\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4}|\d{1,2}\s+[a-z]{3,9}\.?\s+\d{2,4}|[a-z]{3,9}\.?\s+\d{1,2},?\s+\d{2,4})\W*$")
+_CONTROL_LINE = re.compile(r"^\W*(copy\s+\d+\s+of\s+\d+|(control|serial|document|doc|ref|reference)\s*(no\.?|number|#|id)\W*[\w-]*\d[\w-]*)\W*$")
+_WHITESPACE = re.compile(r"\s+")
+
+def canonicalize_chunk(content: str) -> str:
+    """
+    Canonicalize chunk text for duplicate detection: drop page numbers, 
+    collapse whitespace and ignore case.
+    """
+    content = _PAGE_NUMBERS.sub(" ", content)
+    return _WHITESPACE.sub(" ", content).strip().lower()
+
+def _canonical_lines(content: str) -> List[str]:
+    return [line for line in (canonicalize_chunk(line) for line in content.splitlines()) if line]
+
+def _edge_lines(lines: List[str]) -> List[str]:
+    """The first and last line of a chunk with a body, where running headers and footers are found"""
+    return [lines[0], lines[-1]] if len(lines) > 2 else []
+
+def _repeated_lines(chunks: List[DocumentChunk]) -> Set[str]:
+    """
+    Short lines at the top or bottom of chunks that, with their digits ignored, repeat on 
+    DEDUP_REPEATED_LINE_PAGES or more pages. These are running headers and footers, whose dates and 
+    numbers change from page to page. Chunks without page metadata are not considered, since repeats 
+    across chunks of the same page say nothing about headers.
+    """
+    max_chars = int(os.environ.get("DEDUP_BOILERPLATE_MAX_CHARS", 200))
+    pages = {}
+    for chunk in chunks:
+        if chunk.get("page") is None:
+            continue
+        for line in {_DIGITS.sub("#", line) for line in _edge_lines(_canonical_lines(chunk["content"]))}:
+            if len(line) <= max_chars:
+                pages.setdefault(line, set()).add(chunk["page"])
+    min_pages = int(os.environ.get("DEDUP_REPEATED_LINE_PAGES", 3))
+    return {line for line, line_pages in pages.items() if len(line_pages) >= min_pages}
+
+def _duplicate_key(content: str, repeated_lines: Set[str]) -> str:
+    # Digits are only ignored in date and control number lines, and in headers and footers repeated 
+    # across pages, since elsewhere the numbers can decide the classification
+    lines = _canonical_lines(content)
+    edges = _edge_lines(lines)
+    key = []
+    for line in lines:
+        folded = _DIGITS.sub("#", line)
+        boilerplate = (folded in repeated_lines and line in edges) or _DATE_LINE.match(line) or _CONTROL_LINE.match(line)
+        key += [folded if boilerplate else line]
+    return " ".join(key)
+
+def collapse_duplicate_chunks(chunks: List[DocumentChunk]) -> List[DocumentChunk]:
+    """
+    Group identical and near-identical chunks so that only one representative per group is evaluated. 
+    Each representative is the first chunk of its group and carries the other members under "duplicates",
+    so its verdict can be fanned back out to every member.
+
+    :param chunks: The document chunks, in document order.
+    :return: The representative chunks, in document order.
+    """
+    groups = {}
+    repeated_lines = _repeated_lines(chunks)
+    for chunk in chunks:
+        key = _duplicate_key(chunk["content"], repeated_lines)
+        if key in groups:
+            groups[key]["duplicates"] += [chunk]
+        else:
+            groups[key] = {**chunk, "duplicates": []}
+
+    representatives = list(groups.values())
+    collapsed = len(chunks) - len(representatives)
+    if collapsed:
+        logging.info(f"Collapsed {len(chunks)} chunks into {len(representatives)} groups, "
+                     f"{collapsed} duplicate chunk(s) will not be evaluated")
+    return representatives
+
+def expand_duplicates(chunk: DocumentChunk) -> List[DocumentChunk]:
+    """The chunk followed by every duplicate it represents"""
+    return [chunk] + chunk.get("duplicates", [])
@@ -0,0 +1,92 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.state import ExpertAnalysisState, ClassificationDecision, DocumentChunk
+from langchain_core.runnables import RunnableConfig
+from copilotkit.langgraph import copilotkit_emit_state
+from typing import List, Optional
+import time
+import os
+
+_run_progress = {}
+
+def _run_key(config: RunnableConfig) -> tuple:
+    """Identifies the graph step the evaluators run in, which the scatter evaluators share"""
+    metadata = config.get("metadata") or {}
+    return (metadata.get("thread_id") or (config.get("configurable") or {}).get("thread_id"),
+            metadata.get("langgraph_step"))
+
+class EvaluationProgress:
+    """
+    Streams an evaluator's progress to the CopilotKit UI as chunk verdicts complete: chunks done out of
+    the total, positives so far and the most recently flagged excerpt. Emissions are rate-limited to one
+    every EVALUATOR_PROGRESS_INTERVAL seconds, except for the first and last.
+
+    Evaluators running in the same graph step share a progress map, and every emission carries the
+    progress line of each of them, so the scatter evaluators do not overwrite each other's line in the UI.
+    """
+    def __init__(self,
+                 config: RunnableConfig,
+                 state: ExpertAnalysisState,
+                 display_name: str,
+                 total: int,
+                 positive_labels: List[str]):
+        self.config = config
+        self.state = state
+        self.display_name = display_name
+        self.total = total
+        self.positive_labels = positive_labels
+        self.done = 0
+        self.positives = 0
+        self.last_flagged = None
+        self.finished = False
+        self.interval = float(os.environ.get("EVALUATOR_PROGRESS_INTERVAL", 1.0))
+        self._last_emit = None
+        self._run_key = _run_key(config)
+        self._run = _run_progress.setdefault(self._run_key, {})
+        self._run[display_name] = self
+
+    async def start(self):
+        await self._emit(force=True)
+
+    async def update(self, chunks: List[DocumentChunk], decisions: List[Optional[ClassificationDecision]]):
+        """
+        Record completed chunk verdicts and emit progress if the rate limit allows.
+
+        :param chunks: The chunks that completed.
+        :param decisions: Their decisions, None for chunks that were skipped.
+            Unevaluated decisions are not counted.
+        """
+        for chunk, decision in zip(chunks, decisions):
+            if decision is None or decision.get("unevaluated"):
+                continue
+            self.done += 1
+            if decision["classification"] in self.positive_labels:
+                self.positives += 1
+                self.last_flagged = chunk["content"]
+        await self._emit()
+
+    async def finish(self):
+        self.finished = True
+        await self._emit(force=True)
+        if all(progress.finished for progress in self._run.values()):
+            _run_progress.pop(self._run_key, None)
+
+    @property
+    def message(self) -> str:
+        message = (f"{self.display_name} Evaluator agent: {self.done}/{self.total} chunks evaluated, "
+                   f"{self.positives} positive")
+        if self.last_flagged:
+            excerpt = " ".join(self.last_flagged.split())
+            message += f". Latest flagged: \"{excerpt[:160]}{'...' if len(excerpt) > 160 else ''}\""
+        return message
+
+    async def _emit(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._last_emit is not None and now - self._last_emit < self.interval:
+            return
+        self._last_emit = now
+        await copilotkit_emit_state(self.config, {
+            "logs": self.state["logs"] + [{"message": progress.message, "done": progress.finished}
+                                          for progress in list(self._run.values())]
+        })
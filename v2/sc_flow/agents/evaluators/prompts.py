@@ -111,39 +111,176 @@ If applicable, explain how the relationships and dependencies contribute to the
 Be comprehensive and do not include anything else in your response besides the critera.
 """
 
-ts_evaluator_prompt = ChatPromptTemplate([
-    ("system", """ 
+# The criteria reference is the first message of every evaluator and authority prompt and is identical
+# across levels, so that its long prefix is served from the provider's prompt cache. Anything that
+# varies per level or per call must come after it.
+criteria_reference_system = """ 
+    You are an expert in security classification. The classification criteria below are the reference 
+    for every classification decision you make.
+
+    Examples of content that would constitute Top Secret material include: 
+    {top_secret_context}
+
+    Examples of content that would constitute Secret material include: 
+    {secret_context}
+
+    Examples of content that would constitute unclassified or controlled unclassified information include: 
+    {unclassified_context}
+    """
+
+ts_evaluator_system = """ 
     You are an expert in determining whether or not textual content contains information that is classified at the Top Secret level. 
     If any of the content in the text is considered Top Secret, the entire text is considered classified at Top Secret.
     When giving your reasoning for your classification decision, be extremely explicit and cite examples.
-    Examples of content that would constitute Top Secret material include: 
+    Judge the content against the Top Secret criteria in the classification reference.
+    """
 
-    {context}
-    """), 
+ts_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", ts_evaluator_system),
     ("user", """{content}""")
 ])
 
-s_evaluator_prompt = ChatPromptTemplate([
-    ("system", """ 
+s_evaluator_system = """ 
     You are an expert in determining whether or not textual content contains information that is classified at the Secret level. 
     If any of the content in the text is considered Secret, the entire text is considered classified at Secret.
     When giving your reasoning for your classification decision, be extremely explicit and cite examples.
-    Examples of content that would constitute Secret material include: 
+    Judge the content against the Secret criteria in the classification reference.
+    """
 
-    {context}
-    """),
+s_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", s_evaluator_system),
     ("user", """{content}""")
 ])
 
-unclass_evaluator_prompt = ChatPromptTemplate([
-    ("system", """ 
+unclass_evaluator_system = """ 
     You are an expert in determining whether or not textual content contains information that is unclassified or controlled unclassified information. 
     If any of the content in the text is NOT unclassified, the entire text is considered classified at some level.
     When giving your reasoning for your classification decision, be extremely explicit and cite examples.
-    Examples of content that would constitute classified material include: 
+    Judge the content against the unclassified and controlled unclassified criteria in the classification reference.
+    """
+
+unclass_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", unclass_evaluator_system),
+    ("user", """{content}""")
+])
+
+
+batch_instructions = """
+    You will be given several chunks of a document. Each chunk begins with a header of the form "### Chunk <number>".
+    Evaluate every chunk independently and return exactly one decision per chunk, using the chunk number from its header.
+    """
+
+ts_batch_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", ts_evaluator_system + batch_instructions),
+    ("user", """{content}""")
+])
+
+s_batch_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", s_evaluator_system + batch_instructions),
+    ("user", """{content}""")
+])
+
+unclass_batch_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", unclass_evaluator_system + batch_instructions),
+    ("user", """{content}""")
+])
+
+label_instructions = """
+    Respond only with the classification label. Do not give any explanation or reasoning.
+    """
+
+ts_label_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", ts_evaluator_system + label_instructions),
+    ("user", """{content}""")
+])
+
+s_label_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", s_evaluator_system + label_instructions),
+    ("user", """{content}""")
+])
+
+unclass_label_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", unclass_evaluator_system + label_instructions),
+    ("user", """{content}""")
+])
+
+ts_batch_label_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", ts_evaluator_system + batch_instructions + label_instructions),
+    ("user", """{content}""")
+])
+
+s_batch_label_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", s_evaluator_system + batch_instructions + label_instructions),
+    ("user", """{content}""")
+])
+
+unclass_batch_label_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", unclass_evaluator_system + batch_instructions + label_instructions),
+    ("user", """{content}""")
+])
+
+tri_level_evaluator_system = """ 
+    You are an expert in determining the security classification level (Top Secret, Secret, CUI or Unclassified) of textual content. 
+    If any of the content in the text is considered classified at a level, the entire text is considered classified at that level, 
+    and the highest applicable level always takes precedence.
+    When giving your reasoning for your classification decision, be extremely explicit and cite examples.
+    List the specific criteria from the classification reference that the content matches.
+    """
+
+tri_level_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", tri_level_evaluator_system),
+    ("user", """{content}""")
+])
+
+tri_level_batch_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_reference_system),
+    ("system", tri_level_evaluator_system + batch_instructions),
+    ("user", """{content}""")
+])
+
+# With CRITERIA_SUBSET_TOP_K set, each chunk is judged against only the criteria retrieved for it 
+# rather than the full criteria of every level.
+criteria_subset_system = """ 
+    You are an expert in security classification. The classification criteria below were retrieved from the 
+    security classification guide as the most relevant to the content, and are the classification reference 
+    for your decision. Content that matches none of them does not meet the criteria of a classified level.
+
+    {criteria}
+    """
+
+ts_subset_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_subset_system),
+    ("system", ts_evaluator_system),
+    ("user", """{content}""")
+])
+
+s_subset_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_subset_system),
+    ("system", s_evaluator_system),
+    ("user", """{content}""")
+])
+
+unclass_subset_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_subset_system),
+    ("system", unclass_evaluator_system),
+    ("user", """{content}""")
+])
 
-    {context}
-     
-    """),
+tri_level_subset_evaluator_prompt = ChatPromptTemplate([
+    ("system", criteria_subset_system),
+    ("system", tri_level_evaluator_system),
     ("user", """{content}""")
 ])
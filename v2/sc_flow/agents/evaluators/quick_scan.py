@@ -0,0 +1,89 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.state import DocumentChunk
+from .evaluators import evaluate_tri_level
+from .preprocessing import expand_duplicates
+from typing import List, Tuple
+from typing_extensions import TypedDict
+import math
+import os
+
+ESCALATION_LABELS = ["Top Secret", "Secret"]
+
+class QuickScanResult(TypedDict):
+    """Provisional classification of a document from a sample of its chunks"""
+    classification: str
+    escalate: bool
+    sampled_chunks: int
+    total_chunks: int
+    sampled_pages: int
+    total_pages: int
+
+def _spread(items: list, count: int) -> list:
+    """Evenly spaced selection of count items, in order"""
+    return [items[int(i * len(items) / count)] for i in range(count)]
+
+def stratified_sample(chunks: List[DocumentChunk], sample_size: int) -> List[DocumentChunk]:
+    """
+    Sample chunks spread across the document, stratified by page and section level. Every stratum gets a 
+    share of the sample proportional to its size and at least one chunk, unless there are more strata than 
+    samples, in which case evenly spaced strata are sampled once each. The sample is deterministic so 
+    repeated scans hit the verdict cache.
+
+    Args:
+        chunks (List[DocumentChunk]): The document chunks, in document order.
+        sample_size (int): The number of chunks to sample.
+
+    Returns:
+        List[DocumentChunk]: The sampled chunks, in document order.
+    """
+    if sample_size >= len(chunks):
+        return list(chunks)
+
+    strata = {}
+    for chunk in chunks:
+        strata.setdefault((chunk.get("page"), chunk.get("level")), []).append(chunk)
+    strata = list(strata.values())
+
+    if len(strata) >= sample_size:
+        sample = [_spread(stratum, 1)[0] for stratum in _spread(strata, sample_size)]
+    else:
+        sample = [chunk for stratum in strata
+                  for chunk in _spread(stratum, min(len(stratum), max(1, round(sample_size * len(stratum) / len(chunks)))))]
+    return sorted(sample, key=lambda chunk: chunk["chunk_number"])
+
+async def quick_scan(chunks: List[DocumentChunk], criteria_contexts: dict) -> Tuple[list, QuickScanResult]:
+    """
+    Evaluate a stratified sample of QUICK_SCAN_SAMPLE_FRACTION of the chunks, at least QUICK_SCAN_MIN_CHUNKS,
+    for all three levels at once. The scan escalates when any sampled chunk is positive above Unclassified,
+    or could not be evaluated.
+
+    Args:
+        chunks (List[DocumentChunk]): The document chunks, in document order.
+        criteria_contexts (dict): The criteria context of each level.
+
+    Returns:
+        Tuple[list, QuickScanResult]: The decisions for the sampled chunks, fanned out to their duplicates, 
+            and the provisional result with its coverage.
+    """
+    fraction = float(os.environ.get("QUICK_SCAN_SAMPLE_FRACTION", 0.1))
+    sample_size = max(int(os.environ.get("QUICK_SCAN_MIN_CHUNKS", 10)), math.ceil(fraction * len(chunks)))
+    sample = stratified_sample(chunks, sample_size)
+    decisions = await evaluate_tri_level(sample, criteria_contexts)
+
+    sampled_decisions = [{**resp, "chunk_number": member["chunk_number"], "original_content": member["content"]}
+                         for chunk, resp in zip(sample, decisions)
+                         if resp is not None and not resp.get("unevaluated")
+                         for member in expand_duplicates(chunk)]
+    unevaluated = any(resp is not None and resp.get("unevaluated") for resp in decisions)
+    labels = {decision["classification"] for decision in sampled_decisions}
+    classification = next((label for label in ["Top Secret", "Secret", "CUI"] if label in labels), "Unclassified")
+    return sampled_decisions, {
+        "classification": classification,
+        "escalate": classification in ESCALATION_LABELS or unevaluated,
+        "sampled_chunks": len(sample),
+        "total_chunks": len(chunks),
+        "sampled_pages": len({chunk.get("page") for chunk in sample}),
+        "total_pages": len({chunk.get("page") for chunk in chunks}),
+    }
@@ -0,0 +1,129 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.state import DocumentChunk
+from sc_flow.utils.criteria_cache import get_graph_build_version
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import Neo4jVector
+from typing import Dict, List, Tuple
+import numpy as np
+import asyncio
+import logging
+import os
+
+_criteria_embeddings = {}
+_level_criteria_embeddings = {}
+
+async def embed_chunks(chunks: List[DocumentChunk], embeddings: Embeddings) -> np.ndarray:
+    """
+    Embed chunk contents in concurrent batches of TRIAGE_EMBEDDING_BATCH_SIZE.
+
+    :param chunks: The chunks to embed.
+    :param embeddings: The embedding model.
+    :return: A (chunks x dimensions) matrix of unit-normalized embeddings.
+    """
+    batch_size = int(os.environ.get("TRIAGE_EMBEDDING_BATCH_SIZE", 16))
+    contents = [chunk["content"] for chunk in chunks]
+    batches = await asyncio.gather(*(embeddings.aembed_documents(contents[i:i + batch_size])
+                                     for i in range(0, len(contents), batch_size)))
+    return _normalize(np.array([vector for batch in batches for vector in batch]))
+
+def get_criteria_embeddings(store: Neo4jVector) -> np.ndarray:
+    """
+    Load the embeddings of the SCG criteria entities, cached per graph build version.
+
+    :param store: The Neo4j vector store over the SCG knowledge graph.
+    :return: A (entities x dimensions) matrix of unit-normalized embeddings.
+    """
+    graph_version = get_graph_build_version(store)
+    if graph_version not in _criteria_embeddings:
+        records = store.query("""
+            MATCH (e:__Entity__)
+            WHERE e.embedding IS NOT NULL
+            RETURN e.embedding AS embedding
+        """)
+        _criteria_embeddings.clear()
+        _criteria_embeddings[graph_version] = _normalize(np.array([record["embedding"] for record in records]))
+    return _criteria_embeddings[graph_version]
+
+def similarity_scores(chunk_embeddings: np.ndarray, criteria_embeddings: np.ndarray) -> np.ndarray:
+    """
+    Score each chunk by its highest cosine similarity to any criteria embedding.
+
+    :return: One score per chunk.
+    """
+    if len(chunk_embeddings) == 0 or len(criteria_embeddings) == 0:
+        return np.zeros(len(chunk_embeddings))
+    return (chunk_embeddings @ criteria_embeddings.T).max(axis=1)
+
+async def get_level_criteria_embeddings(level: str, context: str, embeddings: Embeddings) -> np.ndarray:
+    """
+    Embed the paragraphs of a level's criteria context, cached until the context changes.
+
+    :param level: The classification level.
+    :param context: The criteria context retrieved for the level.
+    :param embeddings: The embedding model.
+    :return: A (paragraphs x dimensions) matrix of unit-normalized embeddings.
+    """
+    cached = _level_criteria_embeddings.get(level)
+    if cached is None or cached[0] != context:
+        paragraphs = [line.strip() for line in context.splitlines() if line.strip()]
+        vectors = await embeddings.aembed_documents(paragraphs) if paragraphs else []
+        _level_criteria_embeddings[level] = (context, _normalize(np.array(vectors)))
+    return _level_criteria_embeddings[level][1]
+
+async def schedule_chunks(chunks: List[DocumentChunk],
+                          chunk_embeddings: np.ndarray,
+                          criteria_contexts: dict,
+                          embeddings: Embeddings) -> Dict[str, List[int]]:
+    """
+    Rank chunks per level by similarity to the level's criteria, so the most suspicious chunks 
+    are dispatched first. The tri-level ranking uses the higher of the Top Secret and Secret scores.
+
+    :param chunks: The document chunks.
+    :param chunk_embeddings: The unit-normalized chunk embeddings, aligned with the chunks.
+    :param criteria_contexts: The criteria context of each level.
+    :param embeddings: The embedding model.
+    :return: The chunk numbers of each level, most similar first.
+    """
+    levels = list(criteria_contexts)
+    level_embeddings = await asyncio.gather(*(get_level_criteria_embeddings(level, criteria_contexts[level], embeddings)
+                                              for level in levels))
+    scores = {level: similarity_scores(chunk_embeddings, criteria_embeddings)
+              for level, criteria_embeddings in zip(levels, level_embeddings)}
+    scores["tri_level"] = np.maximum(scores["top_secret"], scores["secret"])
+    return {level: [chunks[i]["chunk_number"] for i in np.argsort(-level_scores, kind="stable")]
+            for level, level_scores in scores.items()}
+
+async def triage_chunks(chunks: List[DocumentChunk],
+                        chunk_embeddings: np.ndarray,
+                        store: Neo4jVector,
+                        threshold: float) -> Tuple[List[DocumentChunk], List[dict]]:
+    """
+    Split chunks into those that need LLM evaluation and those that are plainly benign, 
+    i.e. whose similarity to every SCG criteria entity is below the threshold.
+
+    :param chunks: The document chunks.
+    :param chunk_embeddings: The unit-normalized chunk embeddings, aligned with the chunks.
+    :param store: The Neo4j vector store over the SCG knowledge graph.
+    :param threshold: The similarity below which a chunk is marked Unclassified without an LLM call.
+    :return: The chunks to evaluate, and the triaged chunks with their similarity scores. Nothing is triaged
+        when the graph has no criteria embeddings.
+    """
+    criteria_embeddings = await asyncio.to_thread(get_criteria_embeddings, store)
+    if len(criteria_embeddings) == 0:
+        # Without criteria embeddings every score would be zero and every chunk triaged as benign
+        logging.warning("The SCG graph has no __Entity__ embeddings, skipping triage so every chunk is evaluated")
+        return chunks, []
+    scores = similarity_scores(chunk_embeddings, criteria_embeddings)
+
+    kept = [chunk for chunk, score in zip(chunks, scores) if score >= threshold]
+    triaged = [{**chunk, "similarity": float(score)} for chunk, score in zip(chunks, scores) if score < threshold]
+    logging.info(f"Triage skipped {len(triaged)}/{len(chunks)} chunks below similarity {threshold}")
+    return kept, triaged
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    if matrix.size == 0:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
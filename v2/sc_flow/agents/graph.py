@@ -4,30 +4,48 @@
 from .state import State
 from .user_proxy.agent import user_proxy
 from .scg_handler.agent import scg_analyst
-from .evaluators.orchestrator import agent_scatter, classifier_orchestrator
-from .evaluators.evaluators import s_evaluator, ts_evaluator, unclass_evaluator
-from .classifier_authority.agent import classifier_authority
+from .evaluators.orchestrator import agent_scatter, classifier_orchestrator, get_classifier_mode, CLASSIFIER_EVALUATORS
+from .evaluators.evaluators import s_evaluator, ts_evaluator, unclass_evaluator, tri_level_evaluator, cascade_evaluator
+from .classifier_authority.agent import classifier_authority, stored_classification, document_evaluator
 from .document_processors.agent import graph_indexer, document_ingester, get_datasets, confirmation, run_graph_indexer, present_datasets
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
+from functools import partial
 
 global graph
 graph = None
 
-def get_or_build_graph(reinitialize: bool = False, saver = None):
+evaluator_nodes = {
+    "ts_evaluator": ts_evaluator,
+    "s_evaluator": s_evaluator,
+    "unclass_evaluator": unclass_evaluator,
+    "tri_level_evaluator": tri_level_evaluator,
+    "cascade_evaluator": cascade_evaluator,
+}
+
+def get_or_build_graph(reinitialize: bool = False, saver = None, classifier_mode: str = None):
     if graph and not reinitialize:
         return graph
-    return _build_graph(saver)
+    return _build_graph(saver, classifier_mode)
+
+def get_graph_builder(classifier_mode: str = None):
+    return _build_workflow(classifier_mode)
+
+def _build_workflow(classifier_mode: str = None):
+    """
+    Build the agent workflow but don't compile yet
 
-def get_graph_builder():
-    return _build_workflow()
+    :param classifier_mode: How documents are evaluated, scatter (one evaluator per level in parallel), 
+        fused (a single tri-level evaluator) or cascade (levels from highest to lowest, stopping once 
+        a level is confirmed). Defaults to the CLASSIFIER_MODE environment variable.
+    """
+    classifier_mode = get_classifier_mode(classifier_mode)
+    evaluators = CLASSIFIER_EVALUATORS[classifier_mode]
 
-def _build_workflow():
-    """Build the agent workflow but don't compile yet"""
     graph_builder = StateGraph(State)
     graph_builder.add_node("user_proxy", user_proxy)
     graph_builder.add_node("scg_analyst", scg_analyst)
-    graph_builder.add_node("classifier_orchestrator",classifier_orchestrator)
+    graph_builder.add_node("classifier_orchestrator", partial(classifier_orchestrator, classifier_mode=classifier_mode))
 
     graph_builder.add_node("start_processor_request", document_ingester)
     graph_builder.add_node("start_indexer_request", graph_indexer)
@@ -39,10 +57,11 @@ def _build_workflow():
     graph_builder.add_node("submit_indexer", run_graph_indexer)
     graph_builder.add_node("submit_processor", run_graph_indexer)
 
-    graph_builder.add_node("unclass_evaluator", unclass_evaluator)
-    graph_builder.add_node("s_evaluator", s_evaluator)
-    graph_builder.add_node("ts_evaluator", ts_evaluator)
+    for evaluator in evaluators:
+        graph_builder.add_node(evaluator, evaluator_nodes[evaluator])
     graph_builder.add_node("classifier_authority", classifier_authority)
+    graph_builder.add_node("stored_classification", stored_classification)
+    graph_builder.add_node("document_evaluator", document_evaluator)
 
     graph_builder.add_edge(START, "user_proxy")
     graph_builder.add_conditional_edges(
@@ -59,9 +78,10 @@ def _build_workflow():
     )
 
     graph_builder.add_conditional_edges("classifier_orchestrator", 
-                                    agent_scatter, 
-                                    ["ts_evaluator", "s_evaluator", "unclass_evaluator"],
-                                    then="classifier_authority")
+                                    lambda state: agent_scatter(state, classifier_mode), 
+                                    evaluators + ["stored_classification", "document_evaluator", END])
+    for evaluator in evaluators:
+        graph_builder.add_edge(evaluator, "classifier_authority")
 
     graph_builder.add_edge("start_indexer_request", "fetch_available_scgs")
     graph_builder.add_edge("start_processor_request", "fetch_available_documents")
@@ -83,11 +103,13 @@ def _build_workflow():
     graph_builder.add_edge("submit_processor", END)
     graph_builder.add_edge("scg_analyst", END)
     graph_builder.add_edge("classifier_authority", END)
+    graph_builder.add_edge("stored_classification", END)
+    graph_builder.add_edge("document_evaluator", END)
     return graph_builder
 
-def _build_graph(saver = None):
+def _build_graph(saver = None, classifier_mode: str = None):
     """Build the agent graph"""
-    workflow = _build_workflow()
+    workflow = _build_workflow(classifier_mode)
     if not saver:
         saver = MemorySaver()
     graph = workflow.compile(checkpointer=saver)
@@ -9,7 +9,9 @@ from langchain_community.vectorstores import Neo4jVector
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages.ai import AIMessage
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnablePassthrough, RunnableConfig
+from copilotkit.langgraph import copilotkit_customize_config
+from typing import Optional
 import os
 
 class SCGAgent(BaseAgent):
@@ -39,19 +41,20 @@ class SCGAgent(BaseAgent):
     def store(self) -> Neo4jVector:
         return self._store
     
-    async def invoke_chain(self, query: str) -> AIMessage:
+    async def invoke_chain(self, query: str, config: Optional[RunnableConfig] = None) -> AIMessage:
         """
         Executes the chain for security classification guide analysis.
 
         :param question: The user’s question.
+        :param config: The runnable config of the calling node, so the answer streams token by token.
         :return: An AI-generated response.
         """
         
-        resp = await self.chain.ainvoke(query)
+        resp = await self.chain.ainvoke(query, config)
         return AIMessage(content=resp)
     
 
-async def scg_analyst(state: State):
+async def scg_analyst(state: State, config: RunnableConfig):
     topChunks = os.environ.get("TOP_CHUNKS", 3)
     topCommunities = os.environ.get("TOP_COMMUNITIES", 3)
     topInsideRels = os.environ.get("TOP_INSIDE_RELS", 10)
@@ -61,7 +64,7 @@ async def scg_analyst(state: State):
                      neo4j_vector_generator(topChunks, topCommunities, topOutsideRels, topInsideRels)
             )
     
-    resp = await agent(state['last_user_message'].content)
+    resp = await agent(state['last_user_message'].content, copilotkit_customize_config(config, emit_messages=True))
     state['messages'] += [resp]
     state['next_agent'] = "user_proxy"
     return state
\ No newline at end of file
@@ -2,7 +2,7 @@
 # Licensed under the MIT License
 
 from typing import Literal, List, Optional, Annotated
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, NotRequired
 from langgraph.graph import MessagesState
 from langgraph.graph.message import add_messages
 from copilotkit import CopilotKitState
@@ -13,12 +13,52 @@ class Log(TypedDict):
     message: str
     done: bool
 
+def merge_analysis(left: list, right: list) -> list:
+    """Accumulate expert analyses, an empty update clears them for a new classification"""
+    if not right:
+        return []
+    return (left or []) + right
+
+def merge_unevaluated(left: list, right: Optional[list]) -> list:
+    """Accumulate the chunks evaluators could not evaluate, a None update clears them for a new classification"""
+    if right is None:
+        return []
+    return (left or []) + right
+
+class DocumentChunk(TypedDict):
+    """A chunk of an indexed document"""
+    chunk_number: int
+    content: str
+    page: NotRequired[Optional[int]]
+    level: NotRequired[Optional[int]]
+    duplicates: NotRequired[List["DocumentChunk"]]
+    criteria: NotRequired[str]
+
+class EvaluationCoverage(TypedDict):
+    """How many of the document's chunks the classification rests on"""
+    total_chunks: int
+    covered_chunks: int
+    provisional: NotRequired[Optional[str]]
+
 class State(CopilotKitState):
     """State of the user-facing agent"""
     last_user_message: Annotated[str, lambda x,y: y]
     next_agent: Annotated[str, lambda x,y: y]
     ctx_doc: str
     logs: Annotated[list, operator.add]
+    classification_analysis: Annotated[list, merge_analysis]
+    unevaluated_chunks: Annotated[list, merge_unevaluated]
+    coverage: Annotated[Optional[EvaluationCoverage], lambda x,y: y]
+    chunks: Annotated[List[DocumentChunk], lambda x,y: y]
+    triaged_chunks: Annotated[list, lambda x,y: y]
+    marked_chunks: Annotated[list, lambda x,y: y]
+    sampled_chunks: Annotated[list, lambda x,y: y]
+    chunk_schedule: Annotated[dict, lambda x,y: y]
+    rerun_classification: Annotated[bool, lambda x,y: y]
+    document_version: Annotated[dict, lambda x,y: y]
+    stored_result: Annotated[Optional[dict], lambda x,y: y]
+    short_document: Annotated[bool, lambda x,y: y]
+    criteria_contexts: Annotated[dict, lambda x,y: y]
 
 class Router(TypedDict):
     """
@@ -27,6 +67,7 @@ class Router(TypedDict):
     response: str
     next_agent: str
     selected_document_name: Optional[str]
+    rerun_classification: bool
 
 class AvailableDatasets(State):
     """Available AzureML datasets"""
@@ -45,6 +86,38 @@ class ClassificationDecision(TypedDict):
     classification: Literal["Top Secret", "Secret", "CUI", "Unclassified"]
     explanation: str
 
+class ClassificationLabel(TypedDict):
+    """Security classification label without an explanation"""
+    classification: Literal["Top Secret", "Secret", "CUI", "Unclassified"]
+
+class ChunkClassificationLabel(ClassificationLabel):
+    """Security classification label for a single numbered chunk"""
+    chunk_number: int
+
+class BatchClassificationLabel(TypedDict):
+    """Security classification labels for a batch of numbered chunks"""
+    decisions: List[ChunkClassificationLabel]
+
+class ChunkClassificationDecision(ClassificationDecision):
+    """Security classification decision for a single numbered chunk"""
+    chunk_number: int
+
+class BatchClassificationDecision(TypedDict):
+    """Security classification decisions for a batch of numbered chunks"""
+    decisions: List[ChunkClassificationDecision]
+
+class TriLevelClassificationDecision(ClassificationDecision):
+    """Security classification decision across all levels with the criteria it matched"""
+    matched_criteria: str
+
+class ChunkTriLevelClassificationDecision(TriLevelClassificationDecision):
+    """Tri-level security classification decision for a single numbered chunk"""
+    chunk_number: int
+
+class BatchTriLevelClassificationDecision(TypedDict):
+    """Tri-level security classification decisions for a batch of numbered chunks"""
+    decisions: List[ChunkTriLevelClassificationDecision]
+
 class ExpertResponse(TypedDict):
     original_content: str
 
@@ -52,9 +125,15 @@ class ExpertAnalysisState(TypedDict):
     """Classification analysis state"""
     #inner_state: Annotated[State, lambda x,y: y]
     #user_query: Annotated[str, lambda x,y: y]
-    classification_analysis: Annotated[List[ExpertResponse], operator.add]
+    classification_analysis: Annotated[List[ExpertResponse], merge_analysis]
     ctx_doc: str
     logs: Annotated[list, operator.add]
+    chunks: List[DocumentChunk]
+    triaged_chunks: list
+    marked_chunks: list
+    sampled_chunks: list
+    chunk_schedule: dict
+    criteria_contexts: dict
     
     class Config:
         arbitrary_types_allowed = True
\ No newline at end of file
@@ -2,56 +2,94 @@
 # Licensed under the MIT License
 
 from ..state import State, Router
-from .prompt import prompt
+from .prompt import prompt, route_responses
+from .intent import match_intent, message_text
 from sc_flow.agents.base_agent import BaseAgent
 from sc_flow.utils import llm_generator
-from sc_flow.data.sql import get_session, UserFileInteractions
+from sc_flow.utils.selection_store import get_document_selection_store
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnablePassthrough, RunnableConfig
+from typing import Optional
 from langchain_core.messages.ai import AIMessage
-from sqlmodel import select, desc
+import logging
 import os
 
-def get_current_doc():
-    ufi = next(get_session()).exec(select(UserFileInteractions).order_by(desc(UserFileInteractions.timestamp)).limit(1)).all()[0]
-    if ufi.file_url is None:
+def get_current_doc(thread_id: Optional[str] = None) -> str:
+    """The name of the document selected in the thread, empty if none is selected"""
+    file_url = get_document_selection_store().get(thread_id)
+    if file_url is None:
         return ""
-    return ufi.file_url.split("?")[0].split("/")[-1]
+    return file_url.split("?")[0].split("/")[-1]
 
 class ProxyOrchestratorAgent(BaseAgent):
-    def __init__(self, llm: BaseChatModel):
+    def __init__(self, llm: BaseChatModel, document_name: str = ""):
         super().__init__(llm)
+        self.document_name = document_name
         self.build()
 
     def build(self):
         self._chain = (
             {
                 "request": RunnablePassthrough(),
-                "document_name": lambda x: get_current_doc()
+                "document_name": lambda x: self.document_name
             }
             | prompt 
             | self.llm.with_structured_output(Router)
         )
 
 
-    async def invoke_chain(self, query: str):
+    async def invoke_chain(self, query: str, config: Optional[RunnableConfig] = None):
         """
         Executes the chain for security classification guide analysis.
 
         :param question: The user’s question.
+        :param config: The runnable config of the calling node.
         :return: An AI-generated response.
         """
         
-        resp = await self.chain.ainvoke(query)
-        return AIMessage(content=resp["response"]), resp["next_agent"], resp["selected_document_name"]
+        resp = await self.chain.ainvoke(query, config)
+        return AIMessage(content=resp["response"]), resp["next_agent"], resp["selected_document_name"], resp.get("rerun_classification", False)
     
-async def user_proxy(state: State):
-    proxy_agent = ProxyOrchestratorAgent(llm=llm_generator())
-    resp, next_agent, doc_name = await proxy_agent(state["messages"])
+async def user_proxy(state: State, config: RunnableConfig):
+    """
+    Route the user's turn. With INTENT_ROUTER enabled, turns that the local intent router matches 
+    confidently are routed without an LLM call, and every other turn is routed by the LLM.
+    The selected document is the one selected in the conversation's thread.
+    """
+    doc_name = get_current_doc(config.get("configurable", {}).get("thread_id"))
+    intent = None
+    if os.environ.get("INTENT_ROUTER", "true").lower() == "true":
+        intent = await match_intent(message_text(state["messages"][-1]))
+    if intent:
+        routed = _route_locally(state, intent, doc_name)
+        if routed:
+            return routed
+
+    proxy_agent = ProxyOrchestratorAgent(llm=llm_generator(), document_name=doc_name)
+    resp, next_agent, doc_name, rerun = await proxy_agent(state["messages"])
     return {
         "last_user_message": state["messages"][-1],
         "messages": [resp],
         "next_agent": next_agent,
         "ctx_doc": doc_name,
+        "rerun_classification": rerun,
         "logs": [] 
-    }
\ No newline at end of file
+    }
+
+def _route_locally(state: State, intent: dict, doc_name: str) -> Optional[dict]:
+    """The state update for a locally routed turn, None if the LLM must answer it after all"""
+    update = {
+        "last_user_message": state["messages"][-1],
+        "next_agent": intent["next_agent"],
+        "rerun_classification": intent["rerun_classification"],
+        "logs": []
+    }
+    if intent["next_agent"] == "document_classification_experts":
+        if not doc_name:
+            # The LLM asks the user to select a document first
+            return None
+        update["ctx_doc"] = doc_name
+    logging.info(f"Intent router sent the turn to {intent['next_agent']} by {intent['method']} "
+                 f"(confidence {intent['confidence']:.2f}) without an LLM call")
+    response = route_responses[intent["next_agent"]].format(document_name=update.get("ctx_doc"))
+    return {**update, "messages": [AIMessage(content=response)]}
@@ -0,0 +1,100 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from .prompt import route_examples
+from sc_flow.utils import embeddings_generator
+from typing import List, Optional
+from typing_extensions import TypedDict
+import numpy as np
+import logging
+import re
+import os
+
+_GREETING = re.compile(r"^\s*(hi|hello|hey|good (morning|afternoon|evening)|thanks|thank you)( there)?\s*[!.]*\s*$",
+                       re.IGNORECASE)
+_CLASSIFY = re.compile(r"^\s*(please\s+)?(re-?classify|classify|analy[sz]e|evaluate)\s+(this|the|my)\s+"
+                       r"(selected\s+|current\s+)?(document|doc|file)\s*(again\s*)?[!.]*\s*$",
+                       re.IGNORECASE)
+_INDEX_SCG = re.compile(r"^\s*(please\s+)?index\s+(the\s+|a\s+)?(new\s+)?(scg|security classification guide)\s*[!.]*\s*$",
+                        re.IGNORECASE)
+_INDEX_DOCUMENTS = re.compile(r"^\s*(please\s+)?index\s+(the\s+)?(new\s+)?documents\s*[!.]*\s*$",
+                              re.IGNORECASE)
+_RERUN = re.compile(r"\b(re-?classify|re-?run|again)\b", re.IGNORECASE)
+
+_INTENT_RULES = [
+    (_GREETING, "default"),
+    (_CLASSIFY, "document_classification_experts"),
+    (_INDEX_SCG, "security_classification_guide_indexer"),
+    (_INDEX_DOCUMENTS, "document_indexer"),
+]
+
+_example_embeddings = None
+
+class IntentMatch(TypedDict):
+    """A user turn routed without the LLM"""
+    next_agent: str
+    rerun_classification: bool
+    method: str
+    confidence: float
+
+def message_text(message) -> Optional[str]:
+    """The text of a chat message, None if it has no plain text content"""
+    content = getattr(message, "content", message)
+    return content if isinstance(content, str) else None
+
+async def get_example_embeddings() -> List[tuple]:
+    """
+    Embed the labelled route examples once per process. Nothing is cached when embedding fails, 
+    so the next turn tries again.
+
+    :return: (route, unit-normalized example embeddings) for each route.
+    """
+    global _example_embeddings
+    if _example_embeddings is None:
+        routes = list(route_examples)
+        vectors = await embeddings_generator().aembed_documents([example for route in routes 
+                                                                  for example in route_examples[route]])
+        matrix, start, examples = _normalize(np.array(vectors)), 0, []
+        for route in routes:
+            examples += [(route, matrix[start:start + len(route_examples[route])])]
+            start += len(route_examples[route])
+        _example_embeddings = examples
+    return _example_embeddings
+
+async def match_intent(message: str) -> Optional[IntentMatch]:
+    """
+    Route a user turn locally, first by keyword rules and then by nearest neighbour over the labelled
+    route examples. A nearest-neighbour route is only confident when its similarity reaches 
+    INTENT_ROUTER_MIN_SIMILARITY and beats every other route by INTENT_ROUTER_MIN_MARGIN.
+
+    :param message: The user's message.
+    :return: The matched route, or None when the turn should be routed by the LLM.
+    """
+    if not message or not message.strip():
+        return None
+    for pattern, route in _INTENT_RULES:
+        if pattern.match(message):
+            return {"next_agent": route, "rerun_classification": _is_rerun(route, message), "method": "rule", "confidence": 1.0}
+
+    min_similarity = float(os.environ.get("INTENT_ROUTER_MIN_SIMILARITY", 0.85))
+    if min_similarity >= 1:
+        return None
+    try:
+        examples = await get_example_embeddings()
+        query = _normalize(np.array([await embeddings_generator().aembed_query(message)]))[0]
+    except Exception as e:
+        logging.warning(f"Intent router embeddings failed, using the LLM: {e}")
+        return None
+    scores = sorted([(float((embeddings @ query).max()), route) for route, embeddings in examples], reverse=True)
+    (best, route), (runner_up, _) = scores[0], scores[1]
+    if best < min_similarity or best - runner_up < float(os.environ.get("INTENT_ROUTER_MIN_MARGIN", 0.05)):
+        logging.info(f"Intent router not confident ({route} at {best:.2f}, margin {best - runner_up:.2f}), using the LLM")
+        return None
+    return {"next_agent": route, "rerun_classification": _is_rerun(route, message), "method": "embedding", "confidence": best}
+
+def _is_rerun(route: str, message: str) -> bool:
+    return route == "document_classification_experts" and bool(_RERUN.search(message))
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
@@ -9,6 +9,60 @@ available_agents = ["security_classification_guide_expert",
                     "document_indexer", 
                     "default"]
 
+# Labelled example requests for the local intent router, which routes a turn without an LLM call
+# when it is close enough to the examples of one agent. Requests unlike any of them go to the LLM.
+route_examples = {
+    "security_classification_guide_expert": [
+        "What does the security classification guide say about satellite imagery?",
+        "Which program details are classified Secret under the guide?",
+        "What is the classification level for troop movement information?",
+        "How long does the guide say Top Secret information stays classified?",
+        "What criteria make information Top Secret according to the SCG?",
+        "Does the guide cover information about weapons system vulnerabilities?",
+    ],
+    "document_classification_experts": [
+        "Classify this document",
+        "Is the selected document classified?",
+        "What classification level is this document?",
+        "Analyze the document for classified content",
+        "Does this file contain Secret or Top Secret information?",
+        "Run the classification on the current document",
+        "Reclassify the document",
+        "Run the analysis again",
+    ],
+    "security_classification_guide_indexer": [
+        "Index the new security classification guide",
+        "I uploaded a new SCG, please index it",
+        "Build the knowledge graph for the classification guide",
+        "Generate an index for the security classification guide",
+    ],
+    "document_indexer": [
+        "Index the new documents",
+        "I uploaded some documents, please process them",
+        "Ingest the documents I uploaded for evaluation",
+        "Generate an index for the documents to evaluate",
+    ],
+    "default": [
+        "Hello",
+        "Hi there",
+        "Good morning",
+        "Thanks",
+        "Thank you, that's helpful",
+        "What can you do?",
+    ],
+}
+
+# Replies sent with a locally routed turn, in place of the LLM's acknowledgement
+route_responses = {
+    "security_classification_guide_expert": "Let me check the security classification guide on that for you.",
+    "document_classification_experts": "I'm checking on your request, analyzing {document_name} now.",
+    "security_classification_guide_indexer": "I'm checking on your request to index a new security classification guide.",
+    "document_indexer": "I'm checking on your request to index new documents for evaluation.",
+    "default": ("Happy to help! I can answer questions about a security classification guide, classify the selected "
+                "document, and index a new security classification guide or new documents for evaluation. "
+                "What would you like to do?"),
+}
+
 prompt = ChatPromptTemplate([
         ("system", """
             You are a helpful agent who triages user messages to one or more agents.
@@ -21,6 +75,8 @@ prompt = ChatPromptTemplate([
                 - Questions about whether documents or document contents are considered classified and at what level. Any request that requires classifying text or documents should 
                     be forwarded to the document_classification_experts. The currently selected document is {document_name}. If this document name is empty,
                     kindly ask the user to select a document before requesting analysis.
+                    Classifications are stored, so a document that has not changed is answered from its previous classification. Set 
+                    rerun_classification only if the user explicitly asks to classify the document again or to re-run the analysis.
                 - Generate an index for a new security classification guide. This requires the user to have uploaded the security classification guide already.
                 - Generate an index for documents to evaluate. This requires the user to have uploaded the documents already.
          
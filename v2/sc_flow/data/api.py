@@ -22,6 +22,7 @@ class FilesUploadedAck(BaseModel):
 
 class FileSelected(BaseModel):
     file_url: str = Field(None, description="The url of the selected file")
+    thread_id: Optional[str] = Field(None, description="The thread or session id of the conversation the file is selected in")
 
  
 class FileRetrieved(BaseModel):
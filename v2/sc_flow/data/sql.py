@@ -15,6 +15,39 @@ class UserFileInteractions(SQLModel, table=True):
         nullable=True
     )) 
 
+class CriteriaContexts(SQLModel, table=True):
+    level: str = Field(primary_key=True)
+    graph_version: str = Field(primary_key=True)
+    deployment: str = Field(primary_key=True)
+    context: str
+    timestamp: Optional[datetime] = Field(default=None, sa_column=Column(
+        TIMESTAMP(timezone=True),
+        nullable=True
+    ))
+
+class ChunkVerdicts(SQLModel, table=True):
+    key: str = Field(primary_key=True)
+    verdict: str
+    last_accessed: Optional[datetime] = Field(default=None, sa_column=Column(
+        TIMESTAMP(timezone=True),
+        nullable=True,
+        index=True
+    ))
+
+class DocumentResults(SQLModel, table=True):
+    doc_name: str = Field(primary_key=True)
+    document_version: str = Field(primary_key=True)
+    graph_version: str = Field(primary_key=True)
+    evaluation_mode: str = Field(primary_key=True)
+    classification: Optional[str] = None
+    explanation: str
+    verdicts: str
+    coverage: str = "{}"
+    timestamp: Optional[datetime] = Field(default=None, sa_column=Column(
+        TIMESTAMP(timezone=True),
+        nullable=True
+    ))
+
 sqlite_file_name = "user_database.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
@@ -5,13 +5,12 @@ from fastapi import APIRouter, File, UploadFile, HTTPException
 from sc_flow.data.sql import SessionDep, UserFileInteractions
 from sc_flow.data import Ack, FileUploadedAck, FilesUploadedAck, FilesRetrieved, FileRetrieved, FileSelected
 from sc_flow.utils import create_service_sas_blob
+from sc_flow.utils.selection_store import get_document_selection_store
 from azure.storage.blob import BlobClient, ContainerClient
 from azure.identity import DefaultAzureCredential
 from sqlmodel import select, desc
 from typing import List
-from datetime import datetime
 import logging
-import uuid
 import os
 
 router = APIRouter(
@@ -133,18 +132,14 @@ async def get_all_available_docs():
     description="""
        To facilitate interactive analysis, SCFlow will automatically detect when a user is
        viewing a document, with the expectation that the user will leverage the SCFlow agents to 
-       analyze that document.
+       analyze that document. The selection is recorded against the conversation's thread_id, 
+       or as the default selection when no thread_id is given.
     """,
     response_model=Ack,
     responses={200: {"model": Ack}},
 )
-async def handle_selection(selection: FileSelected, session: SessionDep) -> Ack:
-    ufi = UserFileInteractions(session_id = uuid.uuid4().hex, 
-                                file_url = selection.file_url, 
-                                timestamp = datetime.utcnow())
-    session.add(ufi)
-    session.commit()
-    session.refresh(ufi)
+async def handle_selection(selection: FileSelected) -> Ack:
+    get_document_selection_store().select(selection.thread_id, selection.file_url)
     return Ack(ack=True)
 
 @router.get(
@@ -25,22 +25,37 @@ local_mode = True
 
 configure_logging(log_level=logging.INFO)
 
-async def stream_graph_updates(user_input: str, graph):
-    config = {"configurable": {"thread_id": "1"}}
-    async for event in graph.astream({"messages": [("user", user_input)]}, config, stream_mode="updates"):
-        for value in event.values():
+STREAMED_NODES = ["scg_analyst", "classifier_authority"]
+
+async def _print_stream(stream):
+    """
+    Print the answers of STREAMED_NODES token by token as they are generated, and the 
+    message updates of every other node, returning the last update.
+    """
+    value, streamed = None, set()
+    async for mode, event in stream:
+        if mode == "messages":
+            chunk, metadata = event
+            if metadata.get("langgraph_node") in STREAMED_NODES and chunk.content:
+                streamed.add(metadata["langgraph_node"])
+                print(chunk.content, end="", flush=True)
+            continue
+        for node, value in event.items():
+            if node in streamed:
+                print()
+                continue
             if "messages" not in value:
                 continue
             #print("Assistant:", value["messages"][-1].content)
             print(value)
+    return value
+
+async def stream_graph_updates(user_input: str, graph):
+    config = {"configurable": {"thread_id": "1"}}
+    value = await _print_stream(graph.astream({"messages": [("user", user_input)]}, config, stream_mode=["updates", "messages"]))
     if len(graph.get_state(config).next) > 0:
         user_input_val = input(f"{value[0].value}\n")  
-        async for event in graph.astream(Command(resume=user_input_val), config, stream_mode="updates"):
-            for value in event.values():
-                if "messages" not in value:
-                    continue
-                #print("Assistant:", value["messages"][-1].content)
-                print(value)
+        await _print_stream(graph.astream(Command(resume=user_input_val), config, stream_mode=["updates", "messages"]))
 
 def run_local():
     graph = scf.get_or_build_graph()
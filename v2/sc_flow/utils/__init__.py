@@ -2,9 +2,14 @@
 # Licensed under the MIT License
 
 from .scflow_logger import configure_logging
-from .blob_utils import create_service_sas_blob
+from .blob_utils import create_service_sas_blob, get_blob_etag
+from .tokens import num_tokens_from_string
+from .hedging import with_hedging
+from .prompt_cache_metrics import get_prompt_cache_metrics
 from .generators import (
     llm_generator,
+    hedge_llm_generator,
+    get_llm_deployment_name,
     embeddings_generator, 
     neo4j_vector_generator,
     azure_ai_search_generator,
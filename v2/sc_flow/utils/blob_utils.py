@@ -2,7 +2,20 @@
 # Licensed under the MIT License
 
 from azure.storage.blob import BlobClient, generate_blob_sas, BlobSasPermissions
+from azure.identity import DefaultAzureCredential
+from typing import Optional
 import datetime
+import logging
+import os
+
+_credential = None
+
+def get_credential() -> DefaultAzureCredential:
+    """The credential shared by the blob helpers, so its cached token is reused across requests"""
+    global _credential
+    if _credential is None:
+        _credential = DefaultAzureCredential()
+    return _credential
 
 def create_service_sas_blob(blob_client: BlobClient, account_key: str, num_days=1):
     start_time = datetime.datetime.now(datetime.timezone.utc)
@@ -18,4 +31,25 @@ def create_service_sas_blob(blob_client: BlobClient, account_key: str, num_days=
         start=start_time
     )
 
-    return f"{blob_client.url}?{sas_token}"
\ No newline at end of file
+    return f"{blob_client.url}?{sas_token}"
+
+def get_blob_etag(blob_name: str) -> Optional[str]:
+    """
+    Read the ETag of a document in the document cache, which changes whenever the blob is overwritten.
+
+    Args:
+        blob_name (str): The name of the blob.
+
+    Returns:
+        Optional[str]: The ETag, None if the blob properties could not be read. Callers treat it as a miss 
+            of the stored results keyed by ETag.
+    """
+    try:
+        blob_client = BlobClient(os.environ["DOCUMENT_CACHE_URI"],
+                                 os.environ["DOCUMENT_CACHE_CONTAINER"],
+                                 blob_name,
+                                 credential=get_credential())
+        return blob_client.get_blob_properties().etag
+    except Exception as e:
+        logging.info(f"Could not read the ETag of {blob_name}, treating it as a stored-result miss: {e}")
+        return None
@@ -0,0 +1,88 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.data.sql import engine, create_db_and_tables, CriteriaContexts
+from sc_flow.utils.cypher_queries import graph_build_version_query
+from langchain_community.vectorstores import Neo4jVector
+from sqlmodel import Session, delete
+from datetime import datetime, timezone
+from typing import Optional
+import logging
+
+UNVERSIONED_GRAPH = "unversioned"
+
+def get_graph_build_version(store: Neo4jVector) -> str:
+    """
+    Read the version stamped on the SCG knowledge graph by the last completed create_graph build.
+
+    :param store: The Neo4j vector store over the SCG knowledge graph.
+    :return: The graph build version, or "unversioned" for graphs built before versioning.
+    """
+    records = store.query(graph_build_version_query)
+    if not records or records[0]["version"] is None:
+        return UNVERSIONED_GRAPH
+    return records[0]["version"]
+
+class CriteriaContextCache:
+    """
+    Cache of the criteria context retrieved for each classification level.
+
+    Contexts are keyed by (level, graph build version, model deployment) and kept in memory,
+    backed by the SQLite database so they survive restarts. Because a new create_graph build
+    stamps a new graph version, stale contexts are never served; they are dropped the first
+    time a newer version is seen.
+    """
+    def __init__(self):
+        self._contexts = {}
+        self._graph_version = None
+        create_db_and_tables()
+
+    def get(self, level: str, graph_version: str, deployment: str) -> Optional[str]:
+        self._observe_version(graph_version)
+        key = (level, graph_version, deployment)
+        if key not in self._contexts:
+            with Session(engine) as session:
+                row = session.get(CriteriaContexts, key)
+            if row is None:
+                return None
+            self._contexts[key] = row.context
+        return self._contexts[key]
+
+    def put(self, level: str, graph_version: str, deployment: str, context: str):
+        self._observe_version(graph_version)
+        self._contexts[(level, graph_version, deployment)] = context
+        with Session(engine) as session:
+            session.merge(CriteriaContexts(level=level,
+                                           graph_version=graph_version,
+                                           deployment=deployment,
+                                           context=context,
+                                           timestamp=datetime.now(timezone.utc)))
+            session.commit()
+
+    def invalidate(self, keep_version: Optional[str] = None):
+        """
+        Drop every cached context not built from the given graph version.
+
+        :param keep_version: The graph version whose contexts are kept. Drops everything if None.
+        """
+        self._contexts = {key: context for key, context in self._contexts.items()
+                          if key[1] == keep_version}
+        with Session(engine) as session:
+            session.execute(delete(CriteriaContexts).where(CriteriaContexts.graph_version != keep_version))
+            session.commit()
+
+    def _observe_version(self, graph_version: str):
+        if graph_version == self._graph_version:
+            return
+        if self._graph_version is not None:
+            logging.info(f"SCG graph version changed to {graph_version}, invalidating criteria contexts")
+        self._graph_version = graph_version
+        self.invalidate(keep_version=graph_version)
+
+_criteria_cache = None
+
+def get_criteria_cache() -> CriteriaContextCache:
+    global _criteria_cache
+    if _criteria_cache is None:
+        _criteria_cache = CriteriaContextCache()
+    return _criteria_cache
@@ -48,4 +48,9 @@ def get_retrieval_query(topChunks: int,
             Relationships: outsideRels + insideRels, 
             Entities: entities} AS text, 1.0 AS score, {} AS metadata
     """
-    return retrieval_query
\ No newline at end of file
+    return retrieval_query
+
+graph_build_version_query = """
+    MATCH (b:__GraphBuild__ {id: 'scg'})
+    RETURN b.version AS version
+"""
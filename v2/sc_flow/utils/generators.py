@@ -5,6 +5,7 @@ from sc_flow.data import *
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 from langchain_community.vectorstores import Neo4jVector
 from langchain_community.llms import AzureMLOnlineEndpoint
+from sc_flow.utils.prompt_cache_metrics import get_prompt_cache_metrics
 from typing import Union
 import getpass
 import os
@@ -94,13 +95,22 @@ def _embeddings_generator(model_config: Union[AzureOpenAIEmbeddingModel]):
         case _:
              raise ValueError("Invalid model configuration")
 
-def llm_generator():
-    """Dynamically set the model config."""
+def llm_generator(deployment_name: Optional[str] = None, max_tokens: Optional[int] = None):
+    """
+    Dynamically set the model config.
+
+    Args:
+        deployment_name (Optional[str]): Overrides LLM_DEPLOYMENT_NAME for Azure OpenAI models.
+        max_tokens (Optional[int]): Caps the completion tokens of Azure OpenAI models.
+    """
     agent_model = _populate_model(AgentModel.from_env())
 
     match agent_model.MODEL_PROVIDER:
         case LLMProvider.azure_openai:
-            return _llm_generator((_populate_model(AzureOpenAIModel.from_env())))
+            model_config = _populate_model(AzureOpenAIModel.from_env())
+            if deployment_name:
+                setattr(model_config, "LLM_DEPLOYMENT_NAME", deployment_name)
+            return _llm_generator(model_config, max_tokens)
         case LLMProvider.azure_ml:
             return _llm_generator((_populate_model(AzureMachineLearningModel.from_env())))
         case LLMProvider.ollama:
@@ -108,13 +118,36 @@ def llm_generator():
         case _:
             raise ValueError("Invalid model provider, options are: azure_openai | azure_ml | ollama")
 
-def _llm_generator(model_config: Union[AzureOpenAIModel, AzureMachineLearningModel, OllamaModel]):
+def hedge_llm_generator(max_tokens: Optional[int] = None):
+    """
+    The model that hedged requests are sent to, the LLM_HEDGE_DEPLOYMENT_NAME deployment 
+    if one is configured, otherwise the same deployment as llm_generator.
+    """
+    return llm_generator(os.getenv("LLM_HEDGE_DEPLOYMENT_NAME"), max_tokens)
+
+def get_llm_deployment_name() -> str:
+    """
+    Identify the deployment that serves the configured LLM, used to key cached model outputs.
+
+    Returns:
+        str: The Azure OpenAI deployment name or Azure ML endpoint url.
+    """
+    agent_model = _populate_model(AgentModel.from_env())
+    match agent_model.MODEL_PROVIDER:
+        case LLMProvider.azure_ml:
+            return os.getenv("AML_ENDPOINT_URL", "")
+        case _:
+            return os.getenv("LLM_DEPLOYMENT_NAME", "")
+
+def _llm_generator(model_config: Union[AzureOpenAIModel, AzureMachineLearningModel, OllamaModel], 
+                   max_tokens: Optional[int] = None):
     """
     Generates an LLM instance based on the provided model configuration.
 
     Args:
         model_config (Union[AzureOpenAIModel, AzureMachineLearningModel, OllamaModel]): 
             The configuration object for the desired model.
+        max_tokens (Optional[int]): Caps the completion tokens of Azure OpenAI models.
 
     Returns:
         An instance of the appropriate LLM model.
@@ -127,6 +160,8 @@ def _llm_generator(model_config: Union[AzureOpenAIModel, AzureMachineLearningMod
                 azure_endpoint=model_config.AZURE_OPENAI_ENDPOINT,
                 api_key=model_config.AZURE_OPENAI_API_KEY,
                 api_version=model_config.OPENAI_API_VERSION,
+                max_tokens=max_tokens,
+                callbacks=[get_prompt_cache_metrics()],
             )
 
         case AzureMachineLearningModel():
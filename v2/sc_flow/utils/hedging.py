@@ -0,0 +1,106 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from collections import deque
+from typing import Any, Optional
+import asyncio
+import logging
+import math
+import time
+import os
+
+class LatencyTracker:
+    """
+    Rolling window of call latencies, used to derive the delay after which a call is hedged.
+
+    Hedging is enabled with LLM_HEDGE_PERCENTILE, e.g. 95 hedges the calls that take longer than 
+    95% of recent calls. No call is hedged until LLM_HEDGE_MIN_SAMPLES latencies have been observed.
+    """
+    def __init__(self, window: int = None):
+        self.latencies = deque(maxlen=window or int(os.environ.get("LLM_HEDGE_WINDOW", 200)))
+
+    def record(self, latency: float):
+        self.latencies.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        The configured percentile of the observed latencies.
+
+        Returns:
+            Optional[float]: The delay in seconds, None if hedging is disabled or there are too few samples.
+        """
+        percentile = float(os.environ.get("LLM_HEDGE_PERCENTILE", 0))
+        if percentile <= 0 or len(self.latencies) < int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", 20)):
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies), math.ceil(percentile / 100 * len(latencies))) - 1]
+
+_trackers = {}
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    if name not in _trackers:
+        _trackers[name] = LatencyTracker()
+    return _trackers[name]
+
+def with_hedging(primary: Runnable,
+                 hedge: Optional[Runnable] = None,
+                 name: str = "llm",
+                 deadline: Optional[float] = None) -> Runnable:
+    """
+    Wrap an LLM runnable with a per-call deadline and hedged requests.
+
+    If the primary call has not returned after the hedge delay of the named call site, a duplicate 
+    request is sent to the hedge runnable, e.g. the same model on an alternate deployment, and the 
+    first successful result wins while the other request is cancelled. The whole call, including 
+    the hedge, is bounded by the deadline, LLM_CALL_DEADLINE_SECONDS unless given, and raises 
+    TimeoutError when it expires.
+
+    Args:
+        primary (Runnable): The runnable to call.
+        hedge (Optional[Runnable]): The runnable for the hedged request. Defaults to the primary.
+        name (str): The call site, latencies are tracked separately per call site.
+        deadline (Optional[float]): The deadline in seconds for calls that run longer than a chunk evaluation, 0 for none.
+
+    Returns:
+        Runnable: The hedged runnable.
+    """
+    tracker = get_latency_tracker(name)
+    hedge = hedge or primary
+
+    async def _race(input: Any, config: Optional[RunnableConfig]) -> Any:
+        start = time.monotonic()
+        pending = {asyncio.create_task(primary.ainvoke(input, config))}
+        try:
+            delay = tracker.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    logging.info(f"Hedging {name} call after {delay:.1f}s")
+                    # The hedge runs without the caller's callbacks so a streamed response is not emitted twice
+                    pending.add(asyncio.create_task(hedge.ainvoke(input, {**(config or {}), "callbacks": None})))
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        tracker.record(time.monotonic() - start)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _ainvoke(input: Any, config: Optional[RunnableConfig] = None) -> Any:
+        timeout = deadline if deadline is not None else float(os.environ.get("LLM_CALL_DEADLINE_SECONDS", 0))
+        try:
+            return await asyncio.wait_for(_race(input, config), timeout=timeout or None)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{name} call exceeded its {timeout}s deadline")
+
+    def _invoke(input: Any, config: Optional[RunnableConfig] = None) -> Any:
+        return primary.invoke(input, config)
+
+    return RunnableLambda(_invoke, afunc=_ainvoke, name=f"hedged_{name}")
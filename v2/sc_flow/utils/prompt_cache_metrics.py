@@ -0,0 +1,81 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+import threading
+import logging
+
+class PromptCacheMetrics(BaseCallbackHandler):
+    """
+    Callback handler recording, per graph node, how many prompt tokens were served from the provider's 
+    prompt cache, read from the usage metadata of each chat model response.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[UUID, str] = {}
+        self.totals = defaultdict(lambda: {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        with self._lock:
+            self._nodes[run_id] = (metadata or {}).get("langgraph_node", "unknown")
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        prompt_tokens, cached_tokens = _usage(response)
+        with self._lock:
+            node = self._nodes.pop(run_id, "unknown")
+            totals = self.totals[node]
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["cached_tokens"] += cached_tokens
+        logging.debug(f"{node} call used {prompt_tokens} prompt tokens, {cached_tokens} cached")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        with self._lock:
+            self._nodes.pop(run_id, None)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        The totals recorded so far.
+
+        Returns:
+            Dict[str, dict]: Calls, prompt tokens, cached tokens and cache hit rate, by node.
+        """
+        with self._lock:
+            return {node: {**totals, "hit_rate": totals["cached_tokens"] / totals["prompt_tokens"]
+                                                 if totals["prompt_tokens"] else 0.0}
+                    for node, totals in self.totals.items()}
+
+    def log_summary(self):
+        for node, totals in self.snapshot().items():
+            logging.info(f"Prompt cache for {node}: {totals['cached_tokens']}/{totals['prompt_tokens']} prompt tokens "
+                         f"cached ({totals['hit_rate']:.0%}) over {totals['calls']} calls")
+
+def _usage(response: LLMResult) -> Tuple[int, int]:
+    prompt_tokens, cached_tokens = 0, 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0)
+    if prompt_tokens:
+        return prompt_tokens, cached_tokens
+
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return (token_usage.get("prompt_tokens", 0),
+            (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0))
+
+_metrics = None
+
+def get_prompt_cache_metrics() -> PromptCacheMetrics:
+    global _metrics
+    if _metrics is None:
+        _metrics = PromptCacheMetrics()
+    return _metrics
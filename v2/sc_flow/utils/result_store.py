@@ -0,0 +1,75 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.data.sql import engine, create_db_and_tables, DocumentResults
+from sqlmodel import Session, delete
+from datetime import datetime, timezone
+from typing import List, Optional
+import hashlib
+import json
+
+def content_hash(contents: List[str]) -> str:
+    """
+    Hash a document's content, used as its version when the blob ETag is unavailable.
+
+    Args:
+        contents (List[str]): The document's chunk contents, in chunk order.
+
+    Returns:
+        str: The content hash.
+    """
+    digest = hashlib.sha256()
+    for content in contents:
+        digest.update(hashlib.sha256(content.encode("utf-8")).digest())
+    return f"sha256:{digest.hexdigest()}"
+
+class DocumentResultStore:
+    """
+    Persistent store of final document classifications.
+
+    Results are keyed by (document name, document version, graph build version, evaluation mode), where the 
+    document version is the blob ETag or a hash of the indexed content, and the evaluation mode records the 
+    settings that decide how much of the document is evaluated. A changed blob or a new create_graph build 
+    therefore never gets a stale answer, a quick scan or markings-only answer is never returned to a run 
+    configured for a full evaluation, and only the latest result of each document and mode is kept.
+    """
+    def __init__(self):
+        create_db_and_tables()
+
+    def get(self, doc_name: str, document_version: str, graph_version: str, evaluation_mode: str) -> Optional[dict]:
+        with Session(engine) as session:
+            row = session.get(DocumentResults, (doc_name, document_version, graph_version, evaluation_mode))
+        if row is None:
+            return None
+        return {
+            "classification": row.classification,
+            "explanation": row.explanation,
+            "verdicts": json.loads(row.verdicts),
+            "evaluation_mode": row.evaluation_mode,
+            "coverage": json.loads(row.coverage),
+            "timestamp": row.timestamp.isoformat() if row.timestamp else None
+        }
+
+    def put(self, doc_name: str, document_version: str, graph_version: str, evaluation_mode: str,
+            classification: Optional[str], explanation: str, verdicts: list, coverage: dict):
+        with Session(engine) as session:
+            session.execute(delete(DocumentResults).where(DocumentResults.doc_name == doc_name,
+                                                          DocumentResults.evaluation_mode == evaluation_mode))
+            session.add(DocumentResults(doc_name=doc_name,
+                                        document_version=document_version,
+                                        graph_version=graph_version,
+                                        evaluation_mode=evaluation_mode,
+                                        classification=classification,
+                                        explanation=explanation,
+                                        verdicts=json.dumps(verdicts),
+                                        coverage=json.dumps(coverage),
+                                        timestamp=datetime.now(timezone.utc)))
+            session.commit()
+
+_result_store = None
+
+def get_document_result_store() -> DocumentResultStore:
+    global _result_store
+    if _result_store is None:
+        _result_store = DocumentResultStore()
+    return _result_store
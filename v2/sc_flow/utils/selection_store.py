@@ -0,0 +1,67 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.data.sql import engine, create_db_and_tables, UserFileInteractions
+from sqlmodel import Session, select
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+import threading
+import logging
+
+DEFAULT_SELECTION_KEY = "default"
+
+class DocumentSelectionStore:
+    """
+    The document each conversation has selected, keyed by thread or session id.
+
+    Selections are held in memory so the router reads them without a database round trip, and are 
+    written behind to UserFileInteractions on a single writer thread, in the order they were made. 
+    Selections are strictly per thread. Callers that do not identify their thread share the default 
+    selection, which is stored under its own key and never written by a thread's selection.
+    """
+    def __init__(self):
+        create_db_and_tables()
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="selection-writer")
+        self._selections = {}
+        with Session(engine) as session:
+            rows = session.exec(select(UserFileInteractions).order_by(UserFileInteractions.timestamp)).all()
+        for row in rows:
+            self._selections[row.session_id] = row.file_url
+
+    def select(self, thread_id: Optional[str], file_url: Optional[str]):
+        """
+        Record a selection. It is visible to get immediately and persisted in the background.
+
+        Args:
+            thread_id (Optional[str]): The caller's thread or session id, the default selection if None.
+            file_url (Optional[str]): The url of the selected file.
+        """
+        key = thread_id or DEFAULT_SELECTION_KEY
+        with self._lock:
+            self._selections[key] = file_url
+        self._writer.submit(self._persist, key, file_url, datetime.now(timezone.utc))
+
+    def get(self, thread_id: Optional[str]) -> Optional[str]:
+        """
+        Look up the file url a thread has selected, None if it has not selected one. Callers without a 
+        thread id get the default selection.
+        """
+        return self._selections.get(thread_id or DEFAULT_SELECTION_KEY)
+
+    def _persist(self, key: str, file_url: Optional[str], timestamp: datetime):
+        try:
+            with Session(engine) as session:
+                session.merge(UserFileInteractions(session_id=key, file_url=file_url, timestamp=timestamp))
+                session.commit()
+        except Exception as e:
+            logging.error(f"Error persisting the document selection of {key}: {e}")
+
+_selection_store = None
+
+def get_document_selection_store() -> DocumentSelectionStore:
+    global _selection_store
+    if _selection_store is None:
+        _selection_store = DocumentSelectionStore()
+    return _selection_store
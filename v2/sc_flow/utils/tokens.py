@@ -0,0 +1,22 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from functools import lru_cache
+import tiktoken
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    return tiktoken.encoding_for_model(model)
+
+def num_tokens_from_string(string: str, model: str = "gpt-4o") -> int:
+    """
+    Count the number of tokens in a string.
+
+    Args:
+        string (str): The text to tokenize.
+        model (str): The model whose tokenizer should be used. Defaults to gpt-4o.
+
+    Returns:
+        int: The number of tokens in the string.
+    """
+    return len(_get_encoding(model).encode(string))
@@ -0,0 +1,106 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.data.sql import engine, create_db_and_tables, ChunkVerdicts
+from sqlmodel import Session, select, delete, func
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List
+import hashlib
+import json
+import os
+
+class VerdictCache:
+    """
+    Persistent store of chunk verdicts, checked by the evaluators before calling the LLM.
+
+    Verdicts are keyed by a hash of the evaluator, chunk content, criteria context and model deployment,
+    so a verdict is only reused when all of them match. A bounded LRU in memory sits in front of the
+    SQLite table, which is trimmed to VERDICT_CACHE_MAX_ENTRIES by evicting the least recently used rows.
+    """
+    def __init__(self, max_entries: int = None, memory_entries: int = None):
+        self.max_entries = max_entries or int(os.environ.get("VERDICT_CACHE_MAX_ENTRIES", 100000))
+        self.memory_entries = memory_entries or int(os.environ.get("VERDICT_CACHE_MEMORY_ENTRIES", 5000))
+        self.hits = 0
+        self.misses = 0
+        self._verdicts = OrderedDict()
+        create_db_and_tables()
+
+    @staticmethod
+    def key(evaluator: str, content: str, context: str, deployment: str) -> str:
+        digest = hashlib.sha256()
+        for part in (evaluator, content, context, deployment):
+            digest.update(hashlib.sha256(part.encode("utf-8")).digest())
+        return digest.hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, dict]:
+        """
+        Look up verdicts, counting a hit or miss for each key.
+
+        :param keys: The verdict keys.
+        :return: The cached verdicts, by key.
+        """
+        found = {}
+        for key in keys:
+            if key in self._verdicts:
+                self._verdicts.move_to_end(key)
+                found[key] = self._verdicts[key]
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            with Session(engine) as session:
+                rows = session.exec(select(ChunkVerdicts).where(ChunkVerdicts.key.in_(missing))).all()
+                now = datetime.now(timezone.utc)
+                for row in rows:
+                    row.last_accessed = now
+                    session.add(row)
+                    found[row.key] = json.loads(row.verdict)
+                    self._remember(row.key, found[row.key])
+                session.commit()
+
+        self.hits += sum(1 for key in keys if key in found)
+        self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, verdicts: Dict[str, dict]):
+        """
+        Store verdicts, evicting the least recently used entries beyond the size limit.
+
+        :param verdicts: The verdicts to store, by key.
+        """
+        if not verdicts:
+            return
+        now = datetime.now(timezone.utc)
+        with Session(engine) as session:
+            for key, verdict in verdicts.items():
+                self._remember(key, verdict)
+                session.merge(ChunkVerdicts(key=key, verdict=json.dumps(verdict), last_accessed=now))
+            session.commit()
+
+            overflow = session.exec(select(func.count()).select_from(ChunkVerdicts)).one() - self.max_entries
+            if overflow > 0:
+                evicted = select(ChunkVerdicts.key).order_by(ChunkVerdicts.last_accessed).limit(overflow)
+                session.execute(delete(ChunkVerdicts).where(ChunkVerdicts.key.in_(evicted)))
+                session.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def _remember(self, key: str, verdict: dict):
+        self._verdicts[key] = verdict
+        self._verdicts.move_to_end(key)
+        while len(self._verdicts) > self.memory_entries:
+            self._verdicts.popitem(last=False)
+
+_verdict_cache = None
+
+def get_verdict_cache() -> VerdictCache:
+    global _verdict_cache
+    if _verdict_cache is None:
+        _verdict_cache = VerdictCache()
+    return _verdict_cache
@@ -0,0 +1,35 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.evaluators import evaluators
+import asyncio
+
+def test_cascade_stops_once_a_higher_level_is_confirmed(monkeypatch):
+    found = {"top_secret": [{"classification": "Top Secret", "chunk_number": 1}], "secret": [], "unclassified": []}
+    evaluated = []
+
+    async def _evaluate_level(state, config, level, stop_after_positives=None):
+        evaluated.append(level)
+        return found[level], []
+
+    monkeypatch.setattr(evaluators, "_evaluate_level", _evaluate_level)
+
+    result = asyncio.run(evaluators.cascade_evaluator({}, {}))
+
+    assert evaluated == ["top_secret"]
+    assert result["classification_analysis"] == [("top_secret_expert_agent", found["top_secret"]),
+                                                 ("secret_expert_agent", []),
+                                                 ("unclass_expert_agent", [])]
+
+def test_cascade_evaluates_lower_levels_when_higher_are_negative(monkeypatch):
+    evaluated = []
+
+    async def _evaluate_level(state, config, level, stop_after_positives=None):
+        evaluated.append(level)
+        return [], []
+
+    monkeypatch.setattr(evaluators, "_evaluate_level", _evaluate_level)
+
+    asyncio.run(evaluators.cascade_evaluator({}, {}))
+
+    assert evaluated == ["top_secret", "secret", "unclassified"]
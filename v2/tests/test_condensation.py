@@ -0,0 +1,19 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.evaluators.condensation import condense_evidence
+
+def _decision(chunk_number: int, content: str) -> dict:
+    return {"classification": "Secret", "explanation": "Names a collection source.",
+            "chunk_number": chunk_number, "original_content": content}
+
+def test_condensed_evidence_size_is_bounded():
+    small = condense_evidence([_decision(n, "Source ALPHA reports.") for n in range(1, 51)])
+    large = condense_evidence([_decision(n, "Source ALPHA reports.") for n in range(1, 5001)])
+    assert len(large) - len(small) < 10
+    assert "Chunk(s) 1-5000 (Secret)" in large
+
+def test_scattered_chunk_numbers_are_capped():
+    evidence = condense_evidence([_decision(n, "Source ALPHA reports.") for n in range(2, 10001, 2)])
+    assert "Chunk(s) 2, 4, 6, 8, 10 (+4995 more) (Secret)" in evidence
+    assert len(evidence) < 1000
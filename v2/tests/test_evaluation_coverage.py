@@ -0,0 +1,98 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.evaluators import evaluators
+from sc_flow.agents.classifier_authority import agent
+from sc_flow.utils import with_hedging
+from langchain_core.runnables import RunnableLambda
+import asyncio
+
+class FakeVerdictCache:
+    def __init__(self):
+        self.verdicts = {}
+
+    @staticmethod
+    def key(evaluator: str, content: str, context: str, deployment: str) -> str:
+        return f"{evaluator}:{content}"
+
+    def get_many(self, keys):
+        return {key: self.verdicts[key] for key in keys if key in self.verdicts}
+
+    def put_many(self, verdicts):
+        self.verdicts.update(verdicts)
+
+    def stats(self):
+        return ""
+
+class FakeResultStore:
+    def __init__(self):
+        self.puts = []
+
+    def put(self, *args):
+        self.puts += [args]
+
+def _chunk(chunk_number: int, content: str) -> dict:
+    return {"chunk_number": chunk_number, "content": content}
+
+async def _evaluate(content: str) -> dict:
+    if "TS" in content:
+        await asyncio.sleep(1)
+    return {"classification": "Unclassified", "explanation": "No classified content."}
+
+def test_timed_out_chunks_are_unevaluated_and_not_cached(monkeypatch):
+    monkeypatch.setenv("LLM_CALL_DEADLINE_SECONDS", "0.05")
+    monkeypatch.setenv("LLM_CALL_RETRIES", "0")
+    cache = FakeVerdictCache()
+    monkeypatch.setattr(evaluators, "get_verdict_cache", lambda: cache)
+    monkeypatch.setattr(evaluators, "get_llm_deployment_name", lambda: "test")
+    chain = with_hedging(RunnableLambda(_evaluate), name="test_evaluator")
+    chunks = [_chunk(1, "Site survey"), _chunk(2, "TS launch windows"), _chunk(3, "TS targets")]
+
+    decisions = asyncio.run(evaluators._evaluate_document("ts", "ctx", chain, None, chunks))
+
+    assert decisions[0]["classification"] == "Unclassified"
+    assert all(decision["unevaluated"] for decision in decisions[1:])
+    assert evaluators._unevaluated_chunks(chunks, decisions) == [2, 3]
+    assert list(cache.verdicts) == ["ts:Site survey"]
+
+def _authority_state(**kwargs) -> dict:
+    return {
+        "classification_analysis": [("top_secret_expert_agent", []),
+                                    ("secret_expert_agent", [{"classification": "Secret", "explanation": "",
+                                                              "chunk_number": 1, "original_content": "S"}]),
+                                    ("unclass_expert_agent", [])],
+        "unevaluated_chunks": [],
+        "coverage": {"total_chunks": 3, "covered_chunks": 3},
+        "document_version": {"doc_name": "doc.pdf", "version": "etag", "graph_version": "1", "evaluation_mode": "parallel"},
+        "criteria_contexts": {"top_secret": "", "secret": "", "unclassified": ""},
+        "ctx_doc": "doc.pdf",
+        **kwargs
+    }
+
+def test_authority_does_not_decide_or_store_with_unevaluated_chunks(monkeypatch):
+    store = FakeResultStore()
+    monkeypatch.setattr(agent, "get_document_result_store", lambda: store)
+    monkeypatch.setattr(agent, "llm_generator", lambda: None)
+    state = _authority_state(unevaluated_chunks=[2, 3])
+
+    result = asyncio.run(agent.classifier_authority(state, {}))
+
+    assert result["messages"].content.startswith("Classification incomplete: 2 chunk(s)")
+    assert store.puts == []
+
+async def _slow_answer(prompt) -> str:
+    await asyncio.sleep(1)
+    return "Classification Decision: Unclassified"
+
+def test_authority_timeout_replies_incomplete(monkeypatch):
+    monkeypatch.setenv("AUTHORITY_CALL_DEADLINE_SECONDS", "0.05")
+    store = FakeResultStore()
+    monkeypatch.setattr(agent, "get_document_result_store", lambda: store)
+    monkeypatch.setattr(agent, "llm_generator", lambda: RunnableLambda(_slow_answer))
+    monkeypatch.setattr(agent, "hedge_llm_generator", lambda: None)
+
+    result = asyncio.run(agent.classifier_authority(_authority_state(), {}))
+
+    assert "classifier authority call exceeded its deadline" in result["messages"].content
+    assert "at least Secret" in result["messages"].content
+    assert store.puts == []
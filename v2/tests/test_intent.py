@@ -0,0 +1,48 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.user_proxy import intent
+import asyncio
+
+class FailingEmbeddings:
+    async def aembed_documents(self, texts):
+        raise ConnectionError("embeddings service unavailable")
+
+    async def aembed_query(self, text):
+        raise ConnectionError("embeddings service unavailable")
+
+class FakeEmbeddings:
+    """Embeds a text as the one-hot vector of its route"""
+    def __init__(self, routes):
+        self.routes = routes
+
+    def _embed(self, text):
+        return [1.0 if any(text == example for example in intent.route_examples[route]) or route in text else 0.0
+                for route in self.routes]
+
+    async def aembed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text):
+        return self._embed(text)
+
+def test_rules_route_without_embeddings(monkeypatch):
+    monkeypatch.setattr(intent, "embeddings_generator", lambda: FailingEmbeddings())
+    match = asyncio.run(intent.match_intent("Please reclassify this document"))
+    assert match["next_agent"] == "document_classification_experts"
+    assert match["rerun_classification"]
+    assert match["method"] == "rule"
+
+def test_embeddings_failure_falls_back_to_the_llm(monkeypatch):
+    monkeypatch.setattr(intent, "_example_embeddings", None)
+    monkeypatch.setattr(intent, "embeddings_generator", lambda: FailingEmbeddings())
+    assert asyncio.run(intent.match_intent("What does the guide say about launch windows?")) is None
+    assert intent._example_embeddings is None
+
+def test_nearest_example_routes_confidently(monkeypatch):
+    routes = list(intent.route_examples)
+    monkeypatch.setattr(intent, "_example_embeddings", None)
+    monkeypatch.setattr(intent, "embeddings_generator", lambda: FakeEmbeddings(routes))
+    match = asyncio.run(intent.match_intent(f"something about {routes[0]}"))
+    assert match["next_agent"] == routes[0]
+    assert match["method"] == "embedding"
@@ -0,0 +1,69 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.evaluators.markings import detect_markings, mark_chunks
+
+def _chunk(chunk_number: int, content: str, **kwargs) -> dict:
+    return {"chunk_number": chunk_number, "content": content, **kwargs}
+
+def test_detect_portion_markings():
+    markings = detect_markings("(TS//NF) Launch windows. (U) The program office is in Building 4.")
+    assert [(m["classification"], m["span"], m["kind"]) for m in markings] == [
+        ("Top Secret", "(TS//NF)", "portion"),
+        ("Unclassified", "(U)", "portion"),
+    ]
+
+def test_detect_banner_lines():
+    markings = detect_markings("SECRET//NOFORN\nBody text\n  SECRET//NOFORN  ")
+    assert [(m["classification"], m["span"], m["kind"]) for m in markings] == [
+        ("Secret", "SECRET//NOFORN", "banner"),
+        ("Secret", "SECRET//NOFORN", "banner"),
+    ]
+
+def test_unclassified_fouo_is_cui():
+    assert [m["classification"] for m in detect_markings("(U//FOUO) Contract values.")] == ["CUI"]
+
+def test_parenthesized_plurals_are_not_markings():
+    assert detect_markings("NAME(S) OF PERSONNEL") == []
+    assert detect_markings("See ITEM(S) 3 and the attached LIST(S).") == []
+
+def test_banner_words_inside_sentences_are_not_banners():
+    assert detect_markings("The secret to good writing is editing.") == []
+
+def test_mark_chunks_without_markings():
+    chunks = [_chunk(1, "Plain text."), _chunk(2, "More plain text.")]
+    decisions, unmarked, summary = mark_chunks(chunks)
+    assert decisions == []
+    assert unmarked == chunks
+    assert summary is None
+
+def test_mark_chunks_takes_the_highest_marking_per_chunk():
+    chunks = [_chunk(1, "(U) Overview. (S) Unit locations."), _chunk(2, "Unmarked text.")]
+    decisions, unmarked, summary = mark_chunks(chunks)
+    assert [(d["chunk_number"], d["classification"]) for d in decisions] == [(1, "Secret")]
+    assert decisions[0]["markings"] == ["(U)", "(S)"]
+    assert unmarked == [chunks[1]]
+    assert summary["classification"] == "Secret"
+    assert summary["marked_chunks"] == 1
+    assert summary["total_chunks"] == 2
+    assert summary["banner"] is False
+
+def test_mark_chunks_fans_decisions_out_to_duplicates():
+    duplicate = _chunk(3, "(S) Unit locations.")
+    decisions, _, summary = mark_chunks([_chunk(1, "(S) Unit locations.", duplicates=[duplicate])])
+    assert [d["chunk_number"] for d in decisions] == [1, 3]
+    assert summary["total_chunks"] == 2
+
+def test_mark_chunks_consistent_banner_and_portions():
+    _, _, summary = mark_chunks([_chunk(1, "SECRET\n(S) Unit locations.\n(U) Overview.")])
+    assert summary["consistent"] is True
+    assert summary["banner"] is True
+
+def test_mark_chunks_inconsistent_banners():
+    _, _, summary = mark_chunks([_chunk(1, "SECRET\n(S) Unit locations."), _chunk(2, "TOP SECRET\n(S) Routes.")])
+    assert summary["classification"] == "Top Secret"
+    assert summary["consistent"] is False
+
+def test_mark_chunks_banner_below_highest_portion_is_inconsistent():
+    _, _, summary = mark_chunks([_chunk(1, "SECRET\n(TS) Launch windows.")])
+    assert summary["consistent"] is False
@@ -0,0 +1,30 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.evaluators.preprocessing import collapse_duplicate_chunks
+
+def _chunk(chunk_number: int, content: str, page=None) -> dict:
+    return {"chunk_number": chunk_number, "content": content, "page": page}
+
+def test_running_headers_and_footers_are_collapsed():
+    chunks = [_chunk(n, f"Report 2024-{100 + n}\nThe facility is closed on weekends.\nVisitors sign in.\nCopy {n} of 12", page=n)
+              for n in range(1, 5)]
+    assert [chunk["chunk_number"] for chunk in collapse_duplicate_chunks(chunks)] == [1]
+
+def test_numbers_in_substantive_text_are_not_collapsed():
+    chunks = [_chunk(n, f"Convoy {n} departs Site {n + 3} at 0{n}00", page=n) for n in range(1, 4)]
+    assert len(collapse_duplicate_chunks(chunks)) == 3
+
+def test_numbers_in_the_body_of_a_chunk_are_not_collapsed():
+    chunks = [_chunk(n, f"Movement order\nConvoy {n} departs Site {n + 3} at 0{n}00\nEscort of two vehicles", page=n)
+              for n in range(1, 4)]
+    assert len(collapse_duplicate_chunks(chunks)) == 3
+
+def test_repeated_lines_are_not_folded_without_pages():
+    chunks = [_chunk(n, f"Convoy {n} departs at 0300\nEscort of two vehicles\nConvoy {n} arrives at 0900")
+              for n in range(1, 4)]
+    assert len(collapse_duplicate_chunks(chunks)) == 3
+
+def test_date_lines_are_collapsed():
+    chunks = [_chunk(1, "12 March 2024\nThe cafeteria menu."), _chunk(2, "13 March 2024\nThe cafeteria menu.")]
+    assert len(collapse_duplicate_chunks(chunks)) == 1
@@ -0,0 +1,33 @@
+# Copyright (c) 2024 Microsoft Corporation.
+# Licensed under the MIT License
+
+from sc_flow.agents.classifier_authority.rules import decide_by_rules
+
+def _decisions(classification: str, *chunk_numbers: int) -> list:
+    return [{"classification": classification, "explanation": f"{classification} content.",
+             "chunk_number": n, "original_content": f"Chunk {n} content"} for n in chunk_numbers]
+
+def _analysis(top_secret=(), secret=(), unclassified=()) -> dict:
+    return {"top_secret_expert_agent": list(top_secret),
+            "secret_expert_agent": list(secret),
+            "unclass_expert_agent": list(unclassified)}
+
+def test_unclassified_needs_full_coverage():
+    analysis = _analysis(unclassified=_decisions("Unclassified", 1, 2, 3))
+    assert decide_by_rules(analysis, 3, 3).startswith("Classification Decision: Unclassified")
+    assert decide_by_rules(analysis, 2, 3) is None
+
+def test_secret_needs_full_coverage():
+    analysis = _analysis(secret=_decisions("Secret", 1, 2))
+    assert decide_by_rules(analysis, 4, 4).startswith("Classification Decision: Secret")
+    assert decide_by_rules(analysis, 3, 4) is None
+
+def test_top_secret_is_decided_on_partial_coverage():
+    analysis = _analysis(top_secret=_decisions("Top Secret", 1, 2))
+    assert decide_by_rules(analysis, 2, 4).startswith("Classification Decision: Top Secret")
+
+def test_single_finding_is_left_to_the_llm():
+    assert decide_by_rules(_analysis(top_secret=_decisions("Top Secret", 1)), 4, 4) is None
+
+def test_no_chunks_is_not_decided():
+    assert decide_by_rules(_analysis(), 0, 0) is None